@@ -13,7 +13,7 @@ from alembic import context
 
 from app.core.config import settings
 from app.db.database import Base
-from app.db.models import User, Task, UserTask
+from app.db.models import User, Task, UserTask, RefreshToken, TaskEvent
 
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,32 @@
+"""Added indexes for task filtering and ordering
+
+Revision ID: 3f9c2a7d1b84
+Revises: 6173104df980
+Create Date: 2026-10-18 04:35:12.417305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9c2a7d1b84"
+down_revision: Union[str, Sequence[str], None] = "6173104df980"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_tasks_created_at_id", "tasks", ["created_at", "id"], unique=False)
+    op.create_index("ix_tasks_status_created_at_id", "tasks", ["status", "created_at", "id"], unique=False)
+    op.create_index("ix_tasks_completed_at_id", "tasks", ["completed_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tasks_completed_at_id", table_name="tasks")
+    op.drop_index("ix_tasks_status_created_at_id", table_name="tasks")
+    op.drop_index("ix_tasks_created_at_id", table_name="tasks")
@@ -0,0 +1,29 @@
+"""Added token_version for user
+
+Revision ID: 4e8b1d7c2a96
+Revises: c27b5e9f0a13
+Create Date: 2026-10-18 07:41:12.518304
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4e8b1d7c2a96"
+down_revision: Union[str, Sequence[str], None] = "c27b5e9f0a13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("users", sa.Column("token_version", sa.Integer(), server_default="0", nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "token_version")
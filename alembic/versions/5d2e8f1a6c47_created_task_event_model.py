@@ -0,0 +1,39 @@
+"""Created task event model
+
+Revision ID: 5d2e8f1a6c47
+Revises: a91c3f5e7b20
+Create Date: 2026-10-18 11:02:17.482913
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2e8f1a6c47"
+down_revision: Union[str, Sequence[str], None] = "a91c3f5e7b20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "task_events",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("event", sa.String(), nullable=True),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_task_events_created_at"), "task_events", ["created_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_task_events_created_at"), table_name="task_events")
+    op.drop_table("task_events")
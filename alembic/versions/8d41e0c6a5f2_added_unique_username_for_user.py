@@ -0,0 +1,28 @@
+"""Added unique username for User
+
+Revision ID: 8d41e0c6a5f2
+Revises: 3f9c2a7d1b84
+Create Date: 2026-10-18 04:52:37.902114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d41e0c6a5f2"
+down_revision: Union[str, Sequence[str], None] = "3f9c2a7d1b84"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_unique_constraint("users_username_key", "users", ["username"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("users_username_key", "users", type_="unique")
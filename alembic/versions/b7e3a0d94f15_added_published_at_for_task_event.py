@@ -0,0 +1,42 @@
+"""Added published at for task event
+
+Revision ID: b7e3a0d94f15
+Revises: 5d2e8f1a6c47
+Create Date: 2026-10-18 12:14:51.236104
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e3a0d94f15"
+down_revision: Union[str, Sequence[str], None] = "5d2e8f1a6c47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("task_events", sa.Column("published_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE task_events SET published_at = created_at")
+    op.create_index(
+        "ix_task_events_unpublished_id",
+        "task_events",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("published_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_task_events_unpublished_id",
+        table_name="task_events",
+        postgresql_where=sa.text("published_at IS NULL"),
+    )
+    op.drop_column("task_events", "published_at")
@@ -0,0 +1,34 @@
+"""Added cascade delete for users_tasks
+
+Revision ID: c27b5e9f0a13
+Revises: 8d41e0c6a5f2
+Create Date: 2026-10-18 05:08:51.230764
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c27b5e9f0a13"
+down_revision: Union[str, Sequence[str], None] = "8d41e0c6a5f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint("users_tasks_user_id_fkey", "users_tasks", type_="foreignkey")
+    op.drop_constraint("users_tasks_task_id_fkey", "users_tasks", type_="foreignkey")
+    op.create_foreign_key("users_tasks_user_id_fkey", "users_tasks", "users", ["user_id"], ["id"], ondelete="CASCADE")
+    op.create_foreign_key("users_tasks_task_id_fkey", "users_tasks", "tasks", ["task_id"], ["id"], ondelete="CASCADE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("users_tasks_task_id_fkey", "users_tasks", type_="foreignkey")
+    op.drop_constraint("users_tasks_user_id_fkey", "users_tasks", type_="foreignkey")
+    op.create_foreign_key("users_tasks_task_id_fkey", "users_tasks", "tasks", ["task_id"], ["id"])
+    op.create_foreign_key("users_tasks_user_id_fkey", "users_tasks", "users", ["user_id"], ["id"])
@@ -0,0 +1,35 @@
+"""Added publish seq for task event
+
+Revision ID: e41c9b7d2f08
+Revises: b7e3a0d94f15
+Create Date: 2026-10-18 14:37:05.918245
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e41c9b7d2f08"
+down_revision: Union[str, Sequence[str], None] = "b7e3a0d94f15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence("task_events_seq")))
+    op.add_column("task_events", sa.Column("seq", sa.BigInteger(), nullable=True))
+    op.create_unique_constraint(op.f("task_events_seq_key"), "task_events", ["seq"])
+    op.execute("UPDATE task_events SET seq = id WHERE published_at IS NOT NULL")
+    op.execute("SELECT setval('task_events_seq', (SELECT COALESCE(MAX(id), 0) + 1 FROM task_events), false)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(op.f("task_events_seq_key"), "task_events", type_="unique")
+    op.drop_column("task_events", "seq")
+    op.execute(sa.schema.DropSequence(sa.Sequence("task_events_seq")))
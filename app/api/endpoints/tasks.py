@@ -1,39 +1,84 @@
-from fastapi import APIRouter, Depends
+from typing import Annotated, Optional
 
-from app.api.schemas.common import TaskWithUsers, UserWithTasks
-from app.api.schemas.task import TaskAssign, TaskCreate, TaskFromDB
+from fastapi import APIRouter, Body, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.schemas.common import TaskWithUsers
+from app.api.schemas.pagination import Page
+from app.api.schemas.task import TaskAssign, TaskAssignResult, TaskCreate, TaskFromDB, TaskQuery
+from app.api.schemas.user import UserPrincipal
+from app.api.schemas.websocket import EventFilter
+from app.core.config import settings
 from app.core.dependencies import get_current_user
 from app.services.task_service import TaskService, get_task_service
 from app.utils.rbac import PermissionChecker
+from app.utils.sse import stream_events
+from app.utils.websocket import ConnectionManager, get_ws_manager
 
 
 tasks_router = APIRouter(tags=["tasks"], prefix="/tasks")
 
 
-@tasks_router.get("/", response_model=list[TaskFromDB])
+@tasks_router.get("/", response_model=Page[TaskFromDB])
 @PermissionChecker(["user"])
 async def get_tasks(
-    current_user: UserWithTasks = Depends(get_current_user),
+    query: Annotated[TaskQuery, Query()],
+    current_user: UserPrincipal = Depends(get_current_user),
     task_service: TaskService = Depends(get_task_service),
 ):
-    return await task_service.get_tasks()
+    return await task_service.get_tasks(current_user, **query.model_dump())
+
+
+@tasks_router.get("/export/", response_class=StreamingResponse)
+@PermissionChecker(["admin"])
+async def export_tasks(
+    current_user: UserPrincipal = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service),
+):
+    chunks = task_service.export_tasks(settings.EXPORT_CHUNK_SIZE)
+    return StreamingResponse(chunks, media_type="application/x-ndjson")
+
+
+@tasks_router.get("/events/", response_class=StreamingResponse)
+@PermissionChecker(["user"])
+async def get_task_events(
+    event_filter: Annotated[EventFilter, Query()],
+    last_event_id: Annotated[Optional[int], Header()] = None,
+    current_user: UserPrincipal = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service),
+    ws_manager: ConnectionManager = Depends(get_ws_manager),
+):
+    topics, scope = await task_service.get_event_topics(current_user, event_filter)
+    events = stream_events(ws_manager, topics, last_event_id, settings.SSE_KEEP_ALIVE_SECONDS, scope)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events, media_type="text/event-stream", headers=headers)
 
 
 @tasks_router.post("/", response_model=TaskFromDB)
 @PermissionChecker(["admin"])
 async def create_task(
     task: TaskCreate,
-    current_user: UserWithTasks = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     task_service: TaskService = Depends(get_task_service),
 ):
     return await task_service.create_task(task)
 
 
+@tasks_router.post("/bulk/", response_model=list[TaskFromDB])
+@PermissionChecker(["admin"])
+async def create_tasks(
+    tasks: Annotated[list[TaskCreate], Body(min_length=1, max_length=settings.BULK_MAX_SIZE)],
+    current_user: UserPrincipal = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service),
+):
+    return await task_service.create_tasks(tasks)
+
+
 @tasks_router.post("/assign/", response_model=TaskFromDB)
 @PermissionChecker(["admin"])
 async def assign_task(
     assign_data: TaskAssign,
-    current_user: UserWithTasks = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     task_service: TaskService = Depends(get_task_service),
 ):
     return await task_service.assign_task(**assign_data.model_dump())
@@ -43,17 +88,37 @@ async def assign_task(
 @PermissionChecker(["admin"])
 async def unassign_task(
     assign_data: TaskAssign,
-    current_user: UserWithTasks = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     task_service: TaskService = Depends(get_task_service),
 ):
     return await task_service.unassign_task(**assign_data.model_dump())
 
 
+@tasks_router.post("/assign/bulk/", response_model=TaskAssignResult)
+@PermissionChecker(["admin"])
+async def assign_tasks(
+    assignments: Annotated[list[TaskAssign], Body(min_length=1, max_length=settings.BULK_MAX_SIZE)],
+    current_user: UserPrincipal = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service),
+):
+    return await task_service.assign_tasks(assignments)
+
+
+@tasks_router.post("/unassign/bulk/", response_model=TaskAssignResult)
+@PermissionChecker(["admin"])
+async def unassign_tasks(
+    assignments: Annotated[list[TaskAssign], Body(min_length=1, max_length=settings.BULK_MAX_SIZE)],
+    current_user: UserPrincipal = Depends(get_current_user),
+    task_service: TaskService = Depends(get_task_service),
+):
+    return await task_service.unassign_tasks(assignments)
+
+
 @tasks_router.get("/{task_id}/", response_model=TaskWithUsers)
 @PermissionChecker(["admin"])
 async def get_task(
     task_id: int,
-    current_user: UserWithTasks = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     task_service: TaskService = Depends(get_task_service),
 ):
     return await task_service.get_task(id=task_id)
@@ -64,7 +129,7 @@ async def get_task(
 async def update_task(
     task_id: int,
     task: TaskCreate,
-    current_user: UserWithTasks = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     task_service: TaskService = Depends(get_task_service),
 ):
     return await task_service.update_task(task_id, task)
@@ -74,7 +139,7 @@ async def update_task(
 @PermissionChecker(["admin"])
 async def delete_task(
     task_id: int,
-    current_user: UserWithTasks = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     task_service: TaskService = Depends(get_task_service),
 ):
     return await task_service.delete_task(task_id)
@@ -1,11 +1,13 @@
-from typing import List
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query, Request
 
 from app.api.schemas.common import UserWithTasks
-from app.api.schemas.user import AuthToken, UserAuth, UserCreate, UserFromDB
+from app.api.schemas.pagination import Page, PageParams
+from app.api.schemas.user import AuthToken, TokenRefresh, UserAuth, UserCreate, UserFromDB, UserPrincipal
 from app.core.dependencies import get_current_user
 from app.services.user_service import UserService, get_user_service
+from app.utils.rate_limit import LoginAdmission, get_login_admission
 from app.utils.rbac import PermissionChecker
 
 
@@ -13,19 +15,32 @@ users_router = APIRouter(tags=["users"], prefix="/users")
 
 
 @users_router.post("/login/", response_model=AuthToken)
-async def login_user(user: UserAuth, user_service: UserService = Depends(get_user_service)):
-    token = await user_service.login_user(user)
+async def login_user(
+    request: Request,
+    user: UserAuth,
+    user_service: UserService = Depends(get_user_service),
+    login_admission: LoginAdmission = Depends(get_login_admission),
+):
+    client_ip = request.client.host if request.client else "unknown"
+    async with login_admission.admit(user.username, client_ip):
+        token = await user_service.login_user(user)
     return token
 
 
-@users_router.get("/", response_model=List[UserFromDB])
+@users_router.post("/token/refresh/", response_model=AuthToken)
+async def refresh_token(token: TokenRefresh, user_service: UserService = Depends(get_user_service)):
+    return await user_service.refresh_token(token)
+
+
+@users_router.get("/", response_model=Page[UserFromDB])
 @PermissionChecker(["admin"])
 async def get_users(
     request: Request,
-    current_user: UserWithTasks = Depends(get_current_user),
+    query: Annotated[PageParams, Query()],
+    current_user: UserPrincipal = Depends(get_current_user),
     user_service: UserService = Depends(get_user_service),
 ):
-    return await user_service.get_users()
+    return await user_service.get_users(**query.model_dump())
 
 
 @users_router.get("/{user_id}/", response_model=UserWithTasks)
@@ -33,7 +48,7 @@ async def get_users(
 async def get_user(
     request: Request,
     user_id: int,
-    current_user: UserWithTasks = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     user_service: UserService = Depends(get_user_service),
 ):
     result = await user_service.get_user(id=user_id)
@@ -51,7 +66,7 @@ async def update_user(
     request: Request,
     user_id: int,
     user: UserCreate,
-    current_user: UserWithTasks = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     user_service: UserService = Depends(get_user_service),
 ):
     return await user_service.update_user(user_id, user)
@@ -62,7 +77,7 @@ async def update_user(
 async def delete_user(
     request: Request,
     user_id: int,
-    current_user: UserWithTasks = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     user_service: UserService = Depends(get_user_service),
 ):
     return await user_service.delete_user(user_id)
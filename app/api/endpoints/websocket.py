@@ -1,18 +1,29 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends
-from starlette.websockets import WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocket
 
-from app.utils.websocket import ConnectionManager, get_ws_manager
+from app.utils.websocket import ConnectionManager, Encoding, get_ws_manager, negotiate_encoding
 
 
 ws_router = APIRouter()
 
 
 @ws_router.websocket("/ws/tasks/")
-async def subscribe_to_tasks(websocket: WebSocket, ws_manager: ConnectionManager = Depends(get_ws_manager)):
-    await ws_manager.connect(websocket)
+async def subscribe_to_tasks(
+    websocket: WebSocket,
+    last_seq: Optional[int] = None,
+    encoding: Optional[Encoding] = None,
+    ws_manager: ConnectionManager = Depends(get_ws_manager),
+):
+    encoding, subprotocol = negotiate_encoding(websocket, encoding)
+    await ws_manager.connect(websocket, last_seq, encoding, subprotocol)
     try:
         while True:
-            await websocket.receive_json()
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            ws_manager.handle_message(websocket, message.get("text") or message.get("bytes") or "")
 
-    except WebSocketDisconnect:
+    finally:
         await ws_manager.disconnect(websocket)
@@ -0,0 +1,18 @@
+from typing import Generic, Optional, TypeVar
+
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+
+
+ItemT = TypeVar("ItemT")
+
+
+class PageParams(BaseModel):
+    limit: int = Field(settings.PAGE_DEFAULT_LIMIT, ge=1, le=settings.PAGE_MAX_LIMIT)
+    cursor: Optional[str] = None
+
+
+class Page(BaseModel, Generic[ItemT]):
+    items: list[ItemT]
+    next_cursor: Optional[str] = None
@@ -1,7 +1,9 @@
-from datetime import datetime
-from typing import Optional
+from datetime import UTC, datetime
+from typing import Literal, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, field_validator
+
+from app.api.schemas.pagination import PageParams
 
 
 class TaskBase(BaseModel):
@@ -25,3 +27,24 @@ class TaskFromDB(TaskBase):
 class TaskAssign(BaseModel):
     task_id: int
     user_id: int
+
+
+class TaskAssignResult(BaseModel):
+    applied: list[TaskAssign]
+    skipped: list[TaskAssign]
+
+
+class TaskQuery(PageParams):
+    status: Optional[list[str]] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    completed_from: Optional[datetime] = None
+    completed_to: Optional[datetime] = None
+    order_by: Literal["id", "-id", "created_at", "-created_at"] = "id"
+
+    @field_validator("created_from", "created_to", "completed_from", "completed_to")
+    @classmethod
+    def to_naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        if value is None or value.tzinfo is None:
+            return value
+        return value.astimezone(UTC).replace(tzinfo=None)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, ConfigDict
 
 from app.core.security import mask_sensitive_repr
@@ -32,8 +34,20 @@ class UserFromDB(UserBase):
     roles: list = ["user"]
 
 
+class UserPrincipal(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    roles: list
+
+
 class AuthToken(SensitiveReprMixin, BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     access_token: str
     token_type: str = "Bearer"
+    refresh_token: Optional[str] = None
+
+
+class TokenRefresh(SensitiveReprMixin, BaseModel):
+    refresh_token: str
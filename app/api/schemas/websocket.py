@@ -0,0 +1,19 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class EventFilter(BaseModel):
+    task_ids: list[int] = []
+    user_ids: list[int] = []
+    events: list[str] = []
+
+    def get_topics(self) -> set[tuple[str, int | str]]:
+        topics = {("task", task_id) for task_id in self.task_ids}
+        topics.update(("user", user_id) for user_id in self.user_ids)
+        topics.update(("event", event) for event in self.events)
+        return topics
+
+
+class Subscription(EventFilter):
+    action: Literal["subscribe", "unsubscribe", "ping"]
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from dotenv import find_dotenv
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -15,8 +17,40 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str
     JWT_ACCESS_EXPIRE_SECONDS: int
+    JWT_REFRESH_EXPIRE_SECONDS: int = 2592000
     SENSITIVE_FIELDS: str
     TEST_DB_NAME: str
+    PAGE_DEFAULT_LIMIT: int = 50
+    PAGE_MAX_LIMIT: int = 500
+    EXPORT_CHUNK_SIZE: int = 1000
+    BULK_MAX_SIZE: int = 5000
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    TOKEN_VERSION_CACHE_MAX_SIZE: int = 10000
+    TOKEN_VERSION_TTL_SECONDS: float = 5
+    LOGIN_USERNAME_RATE_PER_MINUTE: float = 5
+    LOGIN_USERNAME_BURST: int = 5
+    LOGIN_IP_RATE_PER_MINUTE: float = 30
+    LOGIN_IP_BURST: int = 10
+    LOGIN_LIMITER_MAX_KEYS: int = 100000
+    LOGIN_MAX_CONCURRENT: int = 16
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_CONCURRENCY: int = 4
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 5
+    WS_SEND_QUEUE_SIZE: int = 100
+    WS_BROADCAST_BACKEND: Literal["local", "postgres"] = "local"
+    WS_BROADCAST_CHANNEL: str = "task_events"
+    WS_COALESCE_WINDOW_MS: int = 0
+    WS_REPLAY_BUFFER_SIZE: int = 1000
+    WS_REPLAY_MAX_EVENTS: int = 5000
+    WS_OUTBOX_BATCH_SIZE: int = 500
+    WS_OUTBOX_INTERVAL_MS: int = 1000
+    WS_IDLE_TIMEOUT_SECONDS: float = 0
+    WS_PING_INTERVAL_SECONDS: float = 20
+    WS_PING_TIMEOUT_SECONDS: float = 20
+    WS_PER_MESSAGE_DEFLATE: bool = True
+    SSE_KEEP_ALIVE_SECONDS: float = 15
 
     @classmethod
     @field_validator("SENSITIVE_FIELDS")
@@ -28,6 +62,10 @@ class Settings(BaseSettings):
     def DATABASE_URL(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    @property
+    def DATABASE_DSN(self):
+        return f"postgresql://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+
     @property
     def TEST_DATABASE_URL(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.TEST_DB_NAME}"
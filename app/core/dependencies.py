@@ -1,9 +1,22 @@
-from fastapi import Depends
+from fastapi import Depends, HTTPException, status
 
-from app.core.security import get_current_user_id
+from app.api.schemas.user import UserPrincipal
+from app.core.security import decode_token, get_current_user_id
 from app.services.user_service import get_user_service
+from logger import logger
 
 
-async def get_current_user(user_id: int = Depends(get_current_user_id), user_service=Depends(get_user_service)):
-    user = await user_service.get_user(id=user_id)
-    return user
+async def get_current_user(
+    user_id: int = Depends(get_current_user_id),
+    payload: dict = Depends(decode_token),
+    user_service=Depends(get_user_service),
+):
+    if "roles" not in payload or "ver" not in payload:
+        user = await user_service.get_principal(user_id)
+        return user
+
+    token_version = await user_service.get_token_version(user_id)
+    if token_version != payload["ver"]:
+        logger.warning(f"Exception: revoked token for user {user_id}")
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Token revoked")
+    return UserPrincipal(id=user_id, roles=payload["roles"])
@@ -1,4 +1,10 @@
+import asyncio
 import datetime
+import hashlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Callable, Optional
 
 import jwt
 from fastapi import Depends, HTTPException, status
@@ -6,6 +12,7 @@ from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.utils.cache import RevocationStore, TTLCache, get_revoked_sessions, get_token_cache
 from logger import logger
 
 
@@ -21,19 +28,78 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def create_access_token(user_data: dict) -> str:
+class PasswordHasher:
+    def __init__(self, workers: int, concurrency: int, queue_timeout: float):
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers and self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self.executor
+
+    async def run(self, func: Callable, *args):
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.queue_timeout)
+        except TimeoutError:
+            logger.warning("Exception: password hashing queue timeout")
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Server is busy")
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.get_executor(), func, *args)
+        finally:
+            self.semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+@lru_cache()
+def get_password_hasher() -> PasswordHasher:
+    return PasswordHasher(
+        settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_CONCURRENCY, settings.PASSWORD_HASH_QUEUE_TIMEOUT
+    )
+
+
+async def hash_password(password: str) -> str:
+    return await get_password_hasher().hash(password)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    return await get_password_hasher().verify(plain_password, hashed_password)
+
+
+def create_token(user_data: dict, token_type: str, expire_seconds: int) -> str:
     to_encode = user_data.copy()
     cur_time = datetime.datetime.now(datetime.UTC)
-    expire_delta = datetime.timedelta(seconds=settings.JWT_ACCESS_EXPIRE_SECONDS)
-    to_encode.update({"exp": cur_time + expire_delta})
+    expire_delta = datetime.timedelta(seconds=expire_seconds)
+    to_encode.update({"exp": cur_time + expire_delta, "type": token_type})
     token = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return token
 
 
-def decode_token(token: str = Depends(oauth2_scheme)) -> dict:
+def create_access_token(user_data: dict) -> str:
+    return create_token(user_data, "access", settings.JWT_ACCESS_EXPIRE_SECONDS)
+
+
+def create_refresh_token(user_data: dict) -> str:
+    return create_token(user_data, "refresh", settings.JWT_REFRESH_EXPIRE_SECONDS)
+
+
+def verify_token(token: str) -> dict:
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        return payload
+        return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
     except jwt.ExpiredSignatureError:
         logger.warning("Exception: expired token")
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Token expired")
@@ -42,7 +108,43 @@ def decode_token(token: str = Depends(oauth2_scheme)) -> dict:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid token")
 
 
-def get_current_user_id(payload: dict = Depends(decode_token)) -> int:
+def check_not_revoked(payload: dict, revoked_sessions: RevocationStore):
+    session_id = payload.get("sid")
+    if session_id is not None and revoked_sessions.is_revoked(session_id):
+        logger.warning(f"Exception: revoked session {session_id}")
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Token revoked")
+
+
+async def decode_token(
+    token: str = Depends(oauth2_scheme),
+    token_cache: TTLCache = Depends(get_token_cache),
+    revoked_sessions: RevocationStore = Depends(get_revoked_sessions),
+) -> dict:
+    token_key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(token_key)
+    if payload is None:
+        payload = verify_token(token)
+        if payload.get("type", "access") != "access":
+            logger.warning("Exception: not an access token")
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid token")
+        if "exp" in payload:
+            token_cache.set(token_key, payload, ttl=payload["exp"] - time.time())
+
+    check_not_revoked(payload, revoked_sessions)
+    return payload
+
+
+def decode_refresh_token(token: str, revoked_sessions: RevocationStore) -> dict:
+    payload = verify_token(token)
+    if payload.get("type") != "refresh" or "jti" not in payload or "sid" not in payload:
+        logger.warning("Exception: not a refresh token")
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid token")
+
+    check_not_revoked(payload, revoked_sessions)
+    return payload
+
+
+async def get_current_user_id(payload: dict = Depends(decode_token)) -> int:
     user_id = payload.get("sub")
     if user_id is None:
         logger.warning("Exception: no user id")
@@ -1,24 +1,48 @@
 from abc import ABC, abstractmethod
+from enum import StrEnum
+from typing import Optional
 
 from fastapi import HTTPException, status
-from sqlalchemy import and_, select
+from sqlalchemy import and_, delete, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 
+from app.utils.pagination import decode_cursor, encode_cursor
 from logger import logger, logging_decorator
 
 
+class LoadStrategy(StrEnum):
+    NONE = "none"
+    SELECTIN = "selectin"
+    JOINED = "joined"
+    COUNT = "count"
+
+
 class AbstractRepository(ABC):
     @abstractmethod
     async def add_one(self, data: dict):
         pass
 
+    @abstractmethod
+    async def add_many(self, data: list[dict]):
+        pass
+
     @abstractmethod
     async def find_all(self):
         pass
 
     @abstractmethod
-    async def find_one(self, obj_id: int):
+    async def find_page(self, limit: int, cursor: Optional[str] = None, order_by: str = "id", conditions=()):
+        pass
+
+    @abstractmethod
+    def stream_all(self, chunk_size: int):
+        pass
+
+    @abstractmethod
+    async def find_one(self, load: LoadStrategy = LoadStrategy.SELECTIN, **filters):
         pass
 
     @abstractmethod
@@ -32,6 +56,7 @@ class AbstractRepository(ABC):
 
 class Repository(AbstractRepository):
     model = None
+    order_columns = ("id",)
 
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -40,26 +65,45 @@ class Repository(AbstractRepository):
     def second_model(self):
         return
 
-    async def get_obj(self, **filters):
+    @property
+    def second_model_count(self):
+        return
+
+    def get_load_options(self, load: LoadStrategy) -> list:
+        if load == LoadStrategy.SELECTIN:
+            return [selectinload(self.second_model)]
+        if load == LoadStrategy.JOINED:
+            return [joinedload(self.second_model)]
+        if load == LoadStrategy.COUNT:
+            return [self.second_model_count]
+        return []
+
+    async def get_obj(self, load: LoadStrategy = LoadStrategy.SELECTIN, **filters):
         conditions = [getattr(self.model, key) == val for key, val in filters.items()]
-        query = select(self.model).where(and_(*conditions)).options(selectinload(self.second_model))
+        query = select(self.model).where(and_(*conditions)).options(*self.get_load_options(load))
         result = await self.session.execute(query)
+        if load == LoadStrategy.JOINED:
+            result = result.unique()
         obj = result.scalars().first()
         return obj
 
     @logging_decorator()
     async def add_one(self, data: dict):
-        obj = await self.get_obj(**data)
-        if obj:
-            logger.warning(f"Exception: object {obj} already exists")
+        values = {getattr(self.model, key): val for key, val in data.items()}
+        query = insert(self.model).values(values).on_conflict_do_nothing().returning(self.model)
+        result = await self.session.execute(query)
+        new_obj = result.scalars().first()
+        if new_obj is None:
+            logger.warning(f"Exception: object {self.model.__name__} already exists")
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Already exists")
-
-        new_obj = self.model(**data)
-        self.session.add(new_obj)
-        await self.session.flush()
-        await self.session.refresh(new_obj)
         return new_obj
 
+    @logging_decorator()
+    async def add_many(self, data: list[dict]):
+        query = insert(self.model).returning(self.model, sort_by_parameter_order=True)
+        result = await self.session.execute(query, data)
+        return result.scalars().all()
+
     @logging_decorator()
     async def find_all(self):
         query = select(self.model)
@@ -67,8 +111,40 @@ class Repository(AbstractRepository):
         return result.scalars().all()
 
     @logging_decorator()
-    async def find_one(self, **filters):
-        obj = await self.get_obj(**filters)
+    async def find_page(self, limit: int, cursor: Optional[str] = None, order_by: str = "id", conditions=()):
+        column_name = order_by.removeprefix("-")
+        if column_name not in self.order_columns:
+            logger.warning(f"Exception: object {self.model} can not be ordered by {order_by}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Wrong order")
+
+        descending = order_by.startswith("-")
+        keys = [getattr(self.model, name) for name in dict.fromkeys((column_name, "id"))]
+        query = select(self.model).where(*conditions)
+
+        if cursor is not None:
+            values = decode_cursor(cursor, *(key.type.python_type for key in keys))
+            key, value = tuple_(*keys), tuple_(*values)
+            query = query.where(key < value if descending else key > value)
+
+        query = query.order_by(*(key.desc() if descending else key.asc() for key in keys)).limit(limit + 1)
+        result = await self.session.execute(query)
+        objs = list(result.scalars().all())
+
+        next_cursor = None
+        if len(objs) > limit:
+            objs = objs[:limit]
+            next_cursor = encode_cursor(*(getattr(objs[-1], key.key) for key in keys))
+        return objs, next_cursor
+
+    async def stream_all(self, chunk_size: int):
+        query = select(self.model).order_by(self.model.id).execution_options(yield_per=chunk_size)
+        result = await self.session.stream_scalars(query)
+        async for objs in result.partitions():
+            yield objs
+
+    @logging_decorator()
+    async def find_one(self, load: LoadStrategy = LoadStrategy.SELECTIN, **filters):
+        obj = await self.get_obj(load, **filters)
         if obj:
             return obj
         logger.warning(f"Exception: object {obj} does not exist")
@@ -76,21 +152,33 @@ class Repository(AbstractRepository):
 
     @logging_decorator()
     async def update_one(self, obj_id: int, new_data: dict):
-        obj = await self.find_one(id=obj_id)
-
-        for key, val in new_data.items():
-            if hasattr(obj, key):
-                setattr(obj, key, val)
-            else:
+        for key in new_data:
+            if not hasattr(self.model, key):
                 logger.warning(f"Exception: object {obj_id} has no attribute {key}")
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Wrong data")
 
-        await self.session.flush()
-        await self.session.refresh(obj)
+        if not new_data:
+            return await self.find_one(id=obj_id)
+
+        values = {getattr(self.model, key): val for key, val in new_data.items()}
+        query = update(self.model).where(self.model.id == obj_id).values(values).returning(self.model)
+        try:
+            result = await self.session.execute(query)
+        except IntegrityError:
+            logger.warning(f"Exception: object {self.model.__name__} already exists")
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Already exists")
+        obj = result.scalars().first()
+        if obj is None:
+            logger.warning(f"Exception: object {obj_id} does not exist")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
         return obj
 
     @logging_decorator()
     async def remove_one(self, obj_id: int):
-        obj = await self.find_one(id=obj_id)
-        await self.session.delete(obj)
+        query = delete(self.model).where(self.model.id == obj_id).returning(self.model)
+        result = await self.session.execute(query)
+        obj = result.scalars().first()
+        if obj is None:
+            logger.warning(f"Exception: object {obj_id} does not exist")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
         return obj
@@ -0,0 +1,33 @@
+from typing import Optional
+
+from sqlalchemy import func, update
+
+from app.db.models import RefreshToken
+from app.repositories.base_repository import Repository
+from logger import logging_decorator
+
+
+class RefreshTokenRepository(Repository):
+    model = RefreshToken
+
+    @logging_decorator()
+    async def rotate(self, token_id: str) -> Optional[RefreshToken]:
+        query = (
+            update(RefreshToken)
+            .where(RefreshToken.id == token_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+            .returning(RefreshToken)
+        )
+        result = await self.session.execute(query)
+        return result.scalars().first()
+
+    @logging_decorator()
+    async def revoke_session(self, session_id: str) -> int:
+        query = (
+            update(RefreshToken)
+            .where(RefreshToken.session_id == session_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(query)
+        return result.rowcount
@@ -0,0 +1,77 @@
+from sqlalchemy import BigInteger, case, func, literal, select, update
+
+from app.db.models import TaskEvent, task_event_seq
+from app.repositories.base_repository import Repository
+from logger import logging_decorator
+
+
+DISPATCH_LOCK_ID = 7202461
+
+
+class TaskEventRepository(Repository):
+    model = TaskEvent
+
+    @logging_decorator()
+    async def find_since(self, seq: int, limit: int) -> list[TaskEvent]:
+        query = (
+            select(TaskEvent)
+            .where(TaskEvent.seq > seq, TaskEvent.published_at.is_not(None))
+            .order_by(TaskEvent.seq)
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    @logging_decorator()
+    async def lock_dispatch(self):
+        await self.session.execute(select(func.pg_advisory_xact_lock(DISPATCH_LOCK_ID)))
+
+    @logging_decorator()
+    async def assign_seqs(self, limit: int) -> int:
+        query = (
+            select(TaskEvent.id)
+            .where(TaskEvent.published_at.is_(None), TaskEvent.seq.is_(None))
+            .order_by(TaskEvent.id)
+            .limit(limit)
+        )
+        event_ids = list((await self.session.execute(query)).scalars().all())
+        if not event_ids:
+            return 0
+
+        seqs = await self.next_seqs(len(event_ids))
+        seq = case({event_id: literal(seq, BigInteger) for event_id, seq in zip(event_ids, seqs)}, value=TaskEvent.id)
+        query = (
+            update(TaskEvent)
+            .where(TaskEvent.id.in_(event_ids))
+            .values(seq=seq)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(query)
+        return len(event_ids)
+
+    @logging_decorator()
+    async def next_seqs(self, count: int) -> list[int]:
+        query = select(task_event_seq.next_value()).select_from(func.generate_series(1, count))
+        result = await self.session.execute(query)
+        return sorted(result.scalars().all())
+
+    @logging_decorator()
+    async def find_unpublished(self, limit: int) -> list[TaskEvent]:
+        query = (
+            select(TaskEvent)
+            .where(TaskEvent.published_at.is_(None), TaskEvent.seq.is_not(None))
+            .order_by(TaskEvent.seq)
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    @logging_decorator()
+    async def mark_published(self, event_ids: list[int]):
+        query = (
+            update(TaskEvent)
+            .where(TaskEvent.id.in_(event_ids))
+            .values(published_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(query)
@@ -1,10 +1,90 @@
-from app.db.models import Task
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Integer, column, delete, func, select, tuple_, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import with_expression
+
+from app.db.models import Task, User, UserTask
 from app.repositories.base_repository import Repository
+from logger import logging_decorator
 
 
 class TaskRepository(Repository):
     model = Task
+    order_columns = ("id", "created_at")
 
     @property
     def second_model(self):
         return Task.users
+
+    @property
+    def second_model_count(self):
+        users_count = select(func.count(UserTask.user_id)).where(UserTask.task_id == Task.id).scalar_subquery()
+        return with_expression(Task.users_count, users_count)
+
+    async def find_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        order_by: str = "id",
+        conditions=(),
+        status: Optional[list[str]] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        completed_from: Optional[datetime] = None,
+        completed_to: Optional[datetime] = None,
+    ):
+        conditions = list(conditions)
+        if status:
+            conditions.append(Task.status.in_(status))
+        if created_from is not None:
+            conditions.append(Task.created_at >= created_from)
+        if created_to is not None:
+            conditions.append(Task.created_at < created_to)
+        if completed_from is not None:
+            conditions.append(Task.completed_at >= completed_from)
+        if completed_to is not None:
+            conditions.append(Task.completed_at < completed_to)
+
+        return await super().find_page(limit, cursor, order_by, conditions)
+
+    @logging_decorator()
+    async def find_ids(self, conditions=()) -> list[int]:
+        query = select(Task.id).where(*conditions).order_by(Task.id)
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    @logging_decorator()
+    async def get_assignee_ids(self, task_id: int) -> list[int]:
+        query = select(UserTask.user_id).where(UserTask.task_id == task_id).order_by(UserTask.user_id)
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    @logging_decorator()
+    async def add_assignments(self, assignments: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        pairs = values(column("task_id", Integer), column("user_id", Integer), name="pairs").data(assignments)
+        existing_pairs = (
+            select(pairs.c.task_id, pairs.c.user_id)
+            .join(Task, Task.id == pairs.c.task_id)
+            .join(User, User.id == pairs.c.user_id)
+        )
+        query = (
+            insert(UserTask)
+            .from_select(["task_id", "user_id"], existing_pairs)
+            .on_conflict_do_nothing()
+            .returning(UserTask.task_id, UserTask.user_id)
+        )
+        result = await self.session.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    @logging_decorator()
+    async def remove_assignments(self, assignments: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        query = (
+            delete(UserTask)
+            .where(tuple_(UserTask.task_id, UserTask.user_id).in_(assignments))
+            .returning(UserTask.task_id, UserTask.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(query)
+        return [tuple(row) for row in result.all()]
@@ -1,5 +1,11 @@
-from app.db.models import User
-from app.repositories.base_repository import Repository
+from typing import Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import with_expression
+
+from app.db.models import User, UserTask
+from app.repositories.base_repository import LoadStrategy, Repository
+from logger import logging_decorator
 
 
 class UserRepository(Repository):
@@ -9,6 +15,25 @@ class UserRepository(Repository):
     def second_model(self):
         return User.tasks
 
-    async def get_obj(self, **filters):
+    @property
+    def second_model_count(self):
+        tasks_count = select(func.count(UserTask.task_id)).where(UserTask.user_id == User.id).scalar_subquery()
+        return with_expression(User.tasks_count, tasks_count)
+
+    async def get_obj(self, load: LoadStrategy = LoadStrategy.SELECTIN, **filters):
         filters.pop("password", None)
-        return await super().get_obj(**filters)
+        return await super().get_obj(load, **filters)
+
+    @logging_decorator()
+    async def update_one(self, obj_id: int, new_data: dict):
+        if "roles" in new_data:
+            roles_changed = User.roles != new_data["roles"]
+            token_version = case((roles_changed, User.token_version + 1), else_=User.token_version)
+            new_data = {**new_data, "token_version": token_version}
+        return await super().update_one(obj_id, new_data)
+
+    @logging_decorator()
+    async def get_token_version(self, user_id: int) -> Optional[int]:
+        query = select(User.token_version).where(User.id == user_id)
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
@@ -1,27 +1,58 @@
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 
 from app.api.schemas.common import TaskWithUsers
-from app.api.schemas.task import TaskCreate, TaskFromDB
+from app.api.schemas.pagination import Page
+from app.api.schemas.task import TaskAssign, TaskAssignResult, TaskCreate, TaskFromDB
+from app.api.schemas.user import UserPrincipal
+from app.api.schemas.websocket import EventFilter
+from app.repositories.base_repository import LoadStrategy
+from app.utils.outbox import OutboxDispatcher, get_outbox_dispatcher
+from app.utils.rbac import assigned_tasks_policy
 from app.utils.unit_of_work import IUnitOfWork, get_unit_of_work
-from app.utils.websocket import ConnectionManager, get_ws_manager
 from logger import logger, logging_decorator
 
 
 class TaskService:
-    def __init__(self, uow: IUnitOfWork, ws_manager: ConnectionManager):
+    def __init__(self, uow: IUnitOfWork, outbox: OutboxDispatcher):
         self.uow = uow
-        self.ws_manager = ws_manager
+        self.outbox = outbox
+
+    @logging_decorator()
+    async def get_tasks(
+        self, principal: UserPrincipal, limit: int, cursor: Optional[str] = None, **filters
+    ) -> Page[TaskFromDB]:
+        conditions = assigned_tasks_policy.conditions(principal)
+        async with self.uow as uow:
+            tasks, next_cursor = await uow.task_repo.find_page(limit, cursor, conditions=conditions, **filters)
+            items = [TaskFromDB.model_validate(task) for task in tasks]
+            return Page[TaskFromDB](items=items, next_cursor=next_cursor)
 
     @logging_decorator()
-    async def get_tasks(self) -> list[TaskFromDB]:
+    async def get_event_topics(self, principal: UserPrincipal, event_filter: EventFilter) -> tuple[set, Optional[set]]:
+        topics = event_filter.get_topics()
+        conditions = assigned_tasks_policy.conditions(principal)
+        if not conditions:
+            return topics, None
+
+        async with self.uow as uow:
+            task_ids = await uow.task_repo.find_ids(conditions)
+        scope = {("user", principal.id), *(("task", task_id) for task_id in task_ids)}
+        if any(kind != "event" and (kind, value) not in scope for kind, value in topics):
+            logger.warning(f"Exception: user {principal.id} subscribed to foreign task events")
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
+        return topics, scope
+
+    async def export_tasks(self, chunk_size: int):
         async with self.uow as uow:
-            tasks = await uow.task_repo.find_all()
-            return [TaskFromDB.model_validate(task) for task in tasks]
+            async for tasks in uow.task_repo.stream_all(chunk_size):
+                yield "".join(f"{TaskFromDB.model_validate(task).model_dump_json()}\n" for task in tasks)
 
     @logging_decorator()
     async def get_task(self, **filters) -> TaskWithUsers:
         async with self.uow as uow:
-            task = await uow.task_repo.find_one(**filters)
+            task = await uow.task_repo.find_one(load=LoadStrategy.SELECTIN, **filters)
             return TaskWithUsers.model_validate(task)
 
     @logging_decorator()
@@ -30,20 +61,36 @@ class TaskService:
         async with self.uow as uow:
             new_task = await uow.task_repo.add_one(task_data)
             task_to_return = TaskFromDB.model_validate(new_task)
+            await self.add_event(uow, {"event": "task_created", "task": task_to_return.model_dump(mode="json")})
             await uow.commit()
-
-            await self.ws_manager.broadcast({"event": "task_created", "task": task_to_return.model_dump(mode="json")})
+            self.outbox.notify()
 
             return task_to_return
 
+    @logging_decorator()
+    async def create_tasks(self, tasks: list[TaskCreate]) -> list[TaskFromDB]:
+        tasks_data = [task.model_dump() for task in tasks]
+        async with self.uow as uow:
+            new_tasks = await uow.task_repo.add_many(tasks_data)
+            tasks_to_return = [TaskFromDB.model_validate(task) for task in new_tasks]
+            await self.add_event(
+                uow, {"event": "tasks_created", "tasks": [task.model_dump(mode="json") for task in tasks_to_return]}
+            )
+            await uow.commit()
+            self.outbox.notify()
+
+            return tasks_to_return
+
     @logging_decorator()
     async def delete_task(self, task_id: int) -> TaskFromDB:
         async with self.uow as uow:
+            user_ids = await uow.task_repo.get_assignee_ids(task_id)
             deleted_task = await uow.task_repo.remove_one(task_id)
             task_to_return = TaskFromDB.model_validate(deleted_task)
+            message = {"event": "task_deleted", "task": task_to_return.model_dump(mode="json"), "user_ids": user_ids}
+            await self.add_event(uow, message)
             await uow.commit()
-
-            await self.ws_manager.broadcast({"event": "task_deleted", "task": task_to_return.model_dump(mode="json")})
+            self.outbox.notify()
 
             return task_to_return
 
@@ -53,50 +100,93 @@ class TaskService:
         async with self.uow as uow:
             updated_task = await uow.task_repo.update_one(task_id, task_data)
             task_to_return = TaskFromDB.model_validate(updated_task)
+            user_ids = await uow.task_repo.get_assignee_ids(task_id)
+            message = {"event": "task_updated", "task": task_to_return.model_dump(mode="json"), "user_ids": user_ids}
+            await self.add_event(uow, message)
             await uow.commit()
-
-            await self.ws_manager.broadcast({"event": "task_updated", "task": task_to_return.model_dump(mode="json")})
+            self.outbox.notify()
 
             return task_to_return
 
     @logging_decorator()
     async def assign_task(self, task_id: int, user_id: int) -> TaskFromDB:
         async with self.uow as uow:
-            user = await uow.user_repo.find_one(id=user_id)
-            task = await uow.task_repo.find_one(id=task_id)
+            user = await uow.user_repo.find_one(load=LoadStrategy.NONE, id=user_id)
+            task = await uow.task_repo.find_one(load=LoadStrategy.SELECTIN, id=task_id)
             if user in task.users:
                 logger.warning(f"User {user_id} already assigned to task {task_id}")
                 raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User is already assigned")
 
             task.users.append(user)
             task_to_return = TaskWithUsers.model_validate(task)
+            await self.add_event(uow, {"event": "task_assigned", "task": task_to_return.model_dump(mode="json")})
             await uow.commit()
-
-            await self.ws_manager.broadcast({"event": "task_assigned", "task": task_to_return.model_dump(mode="json")})
+            self.outbox.notify()
 
             return task_to_return
 
     @logging_decorator()
     async def unassign_task(self, task_id: int, user_id: int) -> TaskFromDB:
         async with self.uow as uow:
-            user = await uow.user_repo.find_one(id=user_id)
-            task = await uow.task_repo.find_one(id=task_id)
+            user = await uow.user_repo.find_one(load=LoadStrategy.NONE, id=user_id)
+            task = await uow.task_repo.find_one(load=LoadStrategy.SELECTIN, id=task_id)
             if user not in task.users:
                 logger.warning(f"Exception: user {user_id} not assigned to task {task_id}")
                 raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User is not assigned")
 
             task.users.remove(user)
             task_to_return = TaskWithUsers.model_validate(task)
+            await self.add_event(uow, {"event": "task_unassigned", "task": task_to_return.model_dump(mode="json")})
             await uow.commit()
-
-            await self.ws_manager.broadcast(
-                {"event": "task_unassigned", "task": task_to_return.model_dump(mode="json")}
-            )
+            self.outbox.notify()
 
             return task_to_return
 
+    @logging_decorator()
+    async def assign_tasks(self, assignments: list[TaskAssign]) -> TaskAssignResult:
+        pairs = list(dict.fromkeys((assignment.task_id, assignment.user_id) for assignment in assignments))
+        async with self.uow as uow:
+            applied = await uow.task_repo.add_assignments(pairs)
+            result = self.get_assign_result(pairs, applied)
+            if result.applied:
+                await self.add_event(
+                    uow, {"event": "tasks_assigned", "assignments": [pair.model_dump() for pair in result.applied]}
+                )
+            await uow.commit()
+            self.outbox.notify()
+
+            return result
+
+    @logging_decorator()
+    async def unassign_tasks(self, assignments: list[TaskAssign]) -> TaskAssignResult:
+        pairs = list(dict.fromkeys((assignment.task_id, assignment.user_id) for assignment in assignments))
+        async with self.uow as uow:
+            applied = await uow.task_repo.remove_assignments(pairs)
+            result = self.get_assign_result(pairs, applied)
+            if result.applied:
+                await self.add_event(
+                    uow, {"event": "tasks_unassigned", "assignments": [pair.model_dump() for pair in result.applied]}
+                )
+            await uow.commit()
+            self.outbox.notify()
+
+            return result
+
+    @staticmethod
+    async def add_event(uow: IUnitOfWork, message: dict):
+        await uow.task_event_repo.add_one({"event": message["event"], "payload": message})
+
+    @staticmethod
+    def get_assign_result(pairs: list[tuple[int, int]], applied: list[tuple[int, int]]) -> TaskAssignResult:
+        applied = set(applied)
+        result = {"applied": [], "skipped": []}
+        for task_id, user_id in pairs:
+            key = "applied" if (task_id, user_id) in applied else "skipped"
+            result[key].append(TaskAssign(task_id=task_id, user_id=user_id))
+        return TaskAssignResult(**result)
+
 
 async def get_task_service(
-    uow: IUnitOfWork = Depends(get_unit_of_work), ws_manager: ConnectionManager = Depends(get_ws_manager)
+    uow: IUnitOfWork = Depends(get_unit_of_work), outbox: OutboxDispatcher = Depends(get_outbox_dispatcher)
 ) -> TaskService:
-    return TaskService(uow, ws_manager)
+    return TaskService(uow, outbox)
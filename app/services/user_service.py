@@ -1,33 +1,89 @@
+import uuid
+from datetime import UTC, datetime, timedelta
+from typing import Optional
+
 from fastapi import HTTPException, status
 from fastapi.params import Depends
 
 from app.api.schemas.common import UserWithTasks
-from app.api.schemas.user import AuthToken, UserAuth, UserCreate, UserFromDB
-from app.core.security import create_access_token, get_password_hash, verify_password
+from app.api.schemas.pagination import Page
+from app.api.schemas.user import AuthToken, TokenRefresh, UserAuth, UserCreate, UserFromDB, UserPrincipal
+from app.core.config import settings
+from app.core.security import (
+    check_password,
+    create_access_token,
+    create_refresh_token,
+    decode_refresh_token,
+    hash_password,
+)
+from app.repositories.base_repository import LoadStrategy
+from app.utils.cache import (
+    RevocationStore,
+    TTLCache,
+    get_principal_cache,
+    get_revoked_sessions,
+    get_token_version_cache,
+)
 from app.utils.unit_of_work import IUnitOfWork, get_unit_of_work
 from logger import logger, logging_decorator
 
 
 class UserService:
-    def __init__(self, uow: IUnitOfWork):
+    def __init__(
+        self,
+        uow: IUnitOfWork,
+        principal_cache: TTLCache,
+        token_versions: TTLCache,
+        revoked_sessions: RevocationStore,
+    ):
         self.uow = uow
+        self.principal_cache = principal_cache
+        self.token_versions = token_versions
+        self.revoked_sessions = revoked_sessions
 
     @logging_decorator()
-    async def get_users(self) -> list[UserFromDB]:
+    async def get_users(self, limit: int, cursor: Optional[str] = None) -> Page[UserFromDB]:
         async with self.uow as uow:
-            users = await uow.user_repo.find_all()
-            return [UserFromDB.model_validate(user) for user in users]
+            users, next_cursor = await uow.user_repo.find_page(limit, cursor)
+            items = [UserFromDB.model_validate(user) for user in users]
+            return Page[UserFromDB](items=items, next_cursor=next_cursor)
 
     @logging_decorator()
     async def get_user(self, **filters) -> UserWithTasks:
         async with self.uow as uow:
-            user = await uow.user_repo.find_one(**filters)
+            user = await uow.user_repo.find_one(load=LoadStrategy.SELECTIN, **filters)
             return UserWithTasks.model_validate(user)
 
+    @logging_decorator()
+    async def get_principal(self, user_id: int) -> UserPrincipal:
+        principal = self.principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+
+        async with self.uow as uow:
+            user = await uow.user_repo.find_one(load=LoadStrategy.NONE, id=user_id)
+            principal = UserPrincipal.model_validate(user)
+
+        self.principal_cache.set(user_id, principal)
+        return principal
+
+    @logging_decorator()
+    async def get_token_version(self, user_id: int) -> Optional[int]:
+        token_version = self.token_versions.get(user_id)
+        if token_version is not None:
+            return token_version
+
+        async with self.uow as uow:
+            token_version = await uow.user_repo.get_token_version(user_id)
+
+        if token_version is not None:
+            self.token_versions.set(user_id, token_version)
+        return token_version
+
     @logging_decorator()
     async def create_user(self, user: UserCreate) -> UserFromDB:
         user_data = user.model_dump()
-        user_data["password"] = get_password_hash(user_data["password"])
+        user_data["password"] = await hash_password(user_data["password"])
         async with self.uow as uow:
             new_user = await uow.user_repo.add_one(user_data)
             user_to_return = UserFromDB.model_validate(new_user)
@@ -40,30 +96,86 @@ class UserService:
             deleted_user = await uow.user_repo.remove_one(user_id)
             user_to_return = UserFromDB.model_validate(deleted_user)
             await uow.commit()
+            self.principal_cache.invalidate(user_id)
+            self.token_versions.invalidate(user_id)
             return user_to_return
 
     @logging_decorator()
     async def update_user(self, user_id: int, user: UserCreate) -> UserFromDB:
         user_data = user.model_dump()
-        user_data["password"] = get_password_hash(user_data["password"])
+        user_data["password"] = await hash_password(user_data["password"])
         async with self.uow as uow:
             updated_user = await uow.user_repo.update_one(user_id, user_data)
             user_to_return = UserFromDB.model_validate(updated_user)
+            token_version = updated_user.token_version
             await uow.commit()
+            self.principal_cache.invalidate(user_id)
+            self.token_versions.set(user_id, token_version)
             return user_to_return
 
     @logging_decorator()
     async def login_user(self, user: UserAuth) -> AuthToken:
         user_data = user.model_dump()
         async with self.uow as uow:
-            found_user = await uow.user_repo.find_one(**user_data)
-            if not verify_password(user_data["password"], found_user.password):
-                logger.warning("Exception: wrong password")
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect password")
-            payload = {"sub": str(found_user.id)}
-            token_data = {"access_token": create_access_token(payload)}
-            return AuthToken.model_validate(token_data)
+            found_user = await uow.user_repo.find_one(load=LoadStrategy.NONE, **user_data)
+            hashed_password = found_user.password
+            claims = self.get_claims(found_user)
+
+        if not await check_password(user_data["password"], hashed_password):
+            logger.warning("Exception: wrong password")
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect password")
+
+        async with self.uow as uow:
+            token = await self.issue_tokens(uow, claims, uuid.uuid4().hex)
+            await uow.commit()
+            return token
+
+    @logging_decorator()
+    async def refresh_token(self, token: TokenRefresh) -> AuthToken:
+        payload = decode_refresh_token(token.refresh_token, self.revoked_sessions)
+        session_id = payload["sid"]
+        async with self.uow as uow:
+            stored_token = await uow.refresh_token_repo.rotate(payload["jti"])
+            if stored_token is None:
+                await uow.refresh_token_repo.revoke_session(session_id)
+                await uow.commit()
+                self.revoked_sessions.revoke(session_id, settings.JWT_ACCESS_EXPIRE_SECONDS)
+                logger.warning(f"Exception: refresh token reuse in session {session_id}")
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+
+            found_user = await uow.user_repo.find_one(load=LoadStrategy.NONE, id=stored_token.user_id)
+            new_token = await self.issue_tokens(uow, self.get_claims(found_user), session_id)
+            await uow.commit()
+            return new_token
+
+    @staticmethod
+    def get_claims(user) -> dict:
+        return {"sub": str(user.id), "roles": list(user.roles), "ver": user.token_version}
+
+    @staticmethod
+    async def issue_tokens(uow: IUnitOfWork, claims: dict, session_id: str) -> AuthToken:
+        token_id = uuid.uuid4().hex
+        expire_delta = timedelta(seconds=settings.JWT_REFRESH_EXPIRE_SECONDS)
+        expires_at = datetime.now(UTC).replace(tzinfo=None) + expire_delta
+        refresh_data = {
+            "id": token_id,
+            "user_id": int(claims["sub"]),
+            "session_id": session_id,
+            "expires_at": expires_at,
+        }
+        await uow.refresh_token_repo.add_one(refresh_data)
+
+        token_data = {
+            "access_token": create_access_token({**claims, "sid": session_id}),
+            "refresh_token": create_refresh_token({"sub": claims["sub"], "sid": session_id, "jti": token_id}),
+        }
+        return AuthToken.model_validate(token_data)
 
 
-async def get_user_service(uow: IUnitOfWork = Depends(get_unit_of_work)) -> UserService:
-    return UserService(uow)
+async def get_user_service(
+    uow: IUnitOfWork = Depends(get_unit_of_work),
+    principal_cache: TTLCache = Depends(get_principal_cache),
+    token_versions: TTLCache = Depends(get_token_version_cache),
+    revoked_sessions: RevocationStore = Depends(get_revoked_sessions),
+) -> UserService:
+    return UserService(uow, principal_cache, token_versions, revoked_sessions)
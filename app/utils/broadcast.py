@@ -0,0 +1,123 @@
+import asyncio
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+import asyncpg
+import orjson
+
+from logger import logger
+
+
+MessageHandler = Callable[[dict, str], None]
+
+
+class BroadcastBackend(ABC):
+    @abstractmethod
+    async def start(self, handler: MessageHandler):
+        pass
+
+    @abstractmethod
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, message: dict, frame: str):
+        pass
+
+
+class LocalBroadcastBackend(BroadcastBackend):
+    def __init__(self):
+        self.handler: Optional[MessageHandler] = None
+
+    async def start(self, handler: MessageHandler):
+        self.handler = handler
+
+    async def stop(self):
+        self.handler = None
+
+    async def publish(self, message: dict, frame: str):
+        if self.handler is not None:
+            self.handler(message, frame)
+
+
+class PostgresBroadcastBackend(BroadcastBackend):
+    payload_limit = 7000
+    reconnect_delay = 1
+
+    def __init__(self, dsn: str, channel: str):
+        self.dsn = dsn
+        self.channel = channel
+        self.handler: Optional[MessageHandler] = None
+        self.pool: Optional[asyncpg.Pool] = None
+        self.listener: Optional[asyncpg.Connection] = None
+        self.reconnect_task: Optional[asyncio.Task] = None
+        self.parts: dict[str, list[Optional[str]]] = {}
+
+    async def start(self, handler: MessageHandler):
+        self.handler = handler
+        self.pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=2)
+        await self.listen()
+
+    async def stop(self):
+        if self.reconnect_task is not None:
+            self.reconnect_task.cancel()
+        if self.listener is not None and not self.listener.is_closed():
+            await self.listener.remove_listener(self.channel, self.on_notification)
+            await self.listener.close()
+        if self.pool is not None:
+            await self.pool.close()
+        self.handler = None
+
+    async def listen(self):
+        self.parts.clear()
+        self.listener = await asyncpg.connect(self.dsn)
+        self.listener.add_termination_listener(self.on_termination)
+        await self.listener.add_listener(self.channel, self.on_notification)
+
+    def on_termination(self, connection: asyncpg.Connection):
+        if self.handler is not None:
+            logger.warning(f"Exception: lost LISTEN connection for channel {self.channel}")
+            self.reconnect_task = asyncio.get_running_loop().create_task(self.reconnect())
+
+    async def reconnect(self):
+        while True:
+            await asyncio.sleep(self.reconnect_delay)
+            try:
+                await self.listen()
+                return
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning(f"Exception: LISTEN reconnect failed: {e!r}")
+
+    async def publish(self, message: dict, frame: str):
+        message_id = uuid.uuid4().hex
+        chunks = self.split(frame.encode())
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                for index, chunk in enumerate(chunks):
+                    payload = f"{message_id} {index} {len(chunks)} {chunk}"
+                    await connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    def split(self, data: bytes) -> list[str]:
+        chunks = []
+        while len(data) > self.payload_limit:
+            end = self.payload_limit
+            while data[end] & 0xC0 == 0x80:
+                end -= 1
+            chunks.append(data[:end].decode())
+            data = data[end:]
+        chunks.append(data.decode())
+        return chunks
+
+    def on_notification(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str):
+        message_id, index, count, chunk = payload.split(" ", 3)
+        index, count = int(index), int(count)
+        if count > 1:
+            parts = self.parts.setdefault(message_id, [None] * count)
+            parts[index] = chunk
+            if any(part is None for part in parts):
+                return
+            chunk = "".join(self.parts.pop(message_id))
+
+        if self.handler is not None:
+            self.handler(orjson.loads(chunk), chunk)
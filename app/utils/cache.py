@@ -0,0 +1,101 @@
+import heapq
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Hashable, Optional
+
+from app.core.config import settings
+
+
+class TTLCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expire_at, value = entry
+        if expire_at <= time.monotonic():
+            del self.entries[key]
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expire_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self.entries[key] = (expire_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {"size": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+class RevocationStore:
+    def __init__(self):
+        self.entries: dict[Hashable, float] = {}
+        self.expirations: list[tuple[float, Hashable]] = []
+
+    def revoke(self, key: Hashable, ttl: float):
+        now = time.monotonic()
+        self.prune(now)
+        self.entries[key] = now + ttl
+        heapq.heappush(self.expirations, (now + ttl, key))
+
+    def prune(self, now: float):
+        while self.expirations and self.expirations[0][0] <= now:
+            expire_at, key = heapq.heappop(self.expirations)
+            if self.entries.get(key) == expire_at:
+                del self.entries[key]
+
+    def is_revoked(self, key: Hashable) -> bool:
+        expire_at = self.entries.get(key)
+        if expire_at is None:
+            return False
+        if expire_at <= time.monotonic():
+            del self.entries[key]
+            return False
+        return True
+
+    def clear(self):
+        self.entries.clear()
+        self.expirations.clear()
+
+
+@lru_cache()
+def get_principal_cache() -> TTLCache:
+    return TTLCache(settings.PRINCIPAL_CACHE_MAX_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+@lru_cache()
+def get_token_version_cache() -> TTLCache:
+    return TTLCache(settings.TOKEN_VERSION_CACHE_MAX_SIZE, settings.TOKEN_VERSION_TTL_SECONDS)
+
+
+@lru_cache()
+def get_token_cache() -> TTLCache:
+    return TTLCache(settings.TOKEN_CACHE_MAX_SIZE, settings.JWT_ACCESS_EXPIRE_SECONDS)
+
+
+@lru_cache()
+def get_revoked_sessions() -> RevocationStore:
+    return RevocationStore()
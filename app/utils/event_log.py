@@ -0,0 +1,38 @@
+from collections import deque
+from typing import Callable, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.utils.unit_of_work import IUnitOfWork
+from logger import logger
+
+
+class EventLog:
+    def __init__(self, uow_factory: Callable[[], IUnitOfWork], buffer_size: int, replay_limit: int):
+        self.uow_factory = uow_factory
+        self.replay_limit = replay_limit
+        self.buffer: deque[dict] = deque(maxlen=buffer_size)
+
+    def record(self, message: dict):
+        if "seq" in message:
+            self.buffer.append(message)
+
+    async def get_since(self, last_seq: int) -> Optional[list[dict]]:
+        if self.buffer and min(message["seq"] for message in self.buffer) <= last_seq + 1:
+            events = sorted((message for message in self.buffer if message["seq"] > last_seq), key=self.get_seq)
+        else:
+            try:
+                async with self.uow_factory() as uow:
+                    rows = await uow.task_event_repo.find_since(last_seq, self.replay_limit + 1)
+                    events = [{**row.payload, "seq": row.seq} for row in rows]
+            except (OSError, SQLAlchemyError) as e:
+                logger.warning(f"Exception: task events were not loaded: {e!r}")
+                return None
+
+        if len(events) > self.replay_limit:
+            return None
+        return events
+
+    @staticmethod
+    def get_seq(message: dict) -> int:
+        return message["seq"]
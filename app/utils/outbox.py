@@ -0,0 +1,78 @@
+import asyncio
+from functools import lru_cache, partial
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.db.database import async_session_maker
+from app.utils.unit_of_work import IUnitOfWork, UnitOfWork
+from app.utils.websocket import ConnectionManager, get_ws_manager
+from logger import logger
+
+
+class OutboxDispatcher:
+    def __init__(
+        self, uow_factory: Callable[[], IUnitOfWork], ws_manager: ConnectionManager, batch_size: int, interval: float
+    ):
+        self.uow_factory = uow_factory
+        self.ws_manager = ws_manager
+        self.batch_size = batch_size
+        self.interval = interval
+        self.wakeup = asyncio.Event()
+        self.runner: Optional[asyncio.Task] = None
+        self.published_events = 0
+
+    async def start(self):
+        self.runner = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self.runner is not None:
+            self.runner.cancel()
+            await asyncio.gather(self.runner, return_exceptions=True)
+            self.runner = None
+
+    def notify(self):
+        self.wakeup.set()
+
+    async def run(self):
+        while True:
+            self.wakeup.clear()
+            try:
+                published = await self.dispatch()
+            except Exception as e:
+                logger.exception(f"Exception: outbox dispatch failed: {e!r}")
+                published = 0
+
+            if published < self.batch_size:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), self.interval)
+                except TimeoutError:
+                    pass
+
+    async def dispatch(self) -> int:
+        async with self.uow_factory() as uow:
+            await uow.task_event_repo.lock_dispatch()
+            await uow.task_event_repo.assign_seqs(self.batch_size)
+            await uow.commit()
+
+        async with self.uow_factory() as uow:
+            await uow.task_event_repo.lock_dispatch()
+            events = await uow.task_event_repo.find_unpublished(self.batch_size)
+            if not events:
+                return 0
+
+            await self.ws_manager.publish_events([{**event.payload, "seq": event.seq} for event in events])
+            await uow.task_event_repo.mark_published([event.id for event in events])
+            await uow.commit()
+
+        self.published_events += len(events)
+        return len(events)
+
+
+@lru_cache()
+def get_outbox_dispatcher() -> OutboxDispatcher:
+    return OutboxDispatcher(
+        partial(UnitOfWork, async_session_maker),
+        get_ws_manager(),
+        settings.WS_OUTBOX_BATCH_SIZE,
+        settings.WS_OUTBOX_INTERVAL_MS / 1000,
+    )
@@ -0,0 +1,30 @@
+import base64
+from datetime import datetime
+
+import orjson
+from fastapi import HTTPException, status
+
+from logger import logger
+
+
+def encode_cursor(*values) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode()
+
+
+def parse_cursor_value(value, value_type):
+    if value_type is datetime and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if not isinstance(value, value_type):
+        raise TypeError(f"{value!r} is not {value_type.__name__}")
+    return value
+
+
+def decode_cursor(cursor: str, *types) -> list:
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise TypeError("wrong cursor size")
+        return [parse_cursor_value(value, value_type) for value, value_type in zip(values, types)]
+    except (TypeError, ValueError):
+        logger.warning(f"Exception: invalid cursor {cursor}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
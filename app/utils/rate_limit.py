@@ -0,0 +1,82 @@
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Hashable
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from logger import logger
+
+
+class GCRALimiter:
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int):
+        self.emission_interval = 60 / rate_per_minute
+        self.burst_offset = self.emission_interval * burst
+        self.max_keys = max_keys
+        self.arrivals: OrderedDict[Hashable, float] = OrderedDict()
+
+    def hit(self, key: Hashable) -> float:
+        now = time.monotonic()
+        arrival = max(self.arrivals.get(key, now), now) + self.emission_interval
+        retry_after = arrival - self.burst_offset - now
+        if retry_after > 0:
+            return retry_after
+
+        self.arrivals[key] = arrival
+        self.arrivals.move_to_end(key)
+        while len(self.arrivals) > self.max_keys:
+            self.arrivals.popitem(last=False)
+        return 0
+
+    def clear(self):
+        self.arrivals.clear()
+
+
+class LoginAdmission:
+    def __init__(self, username_limiter: GCRALimiter, ip_limiter: GCRALimiter, max_concurrent: int):
+        self.username_limiter = username_limiter
+        self.ip_limiter = ip_limiter
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+
+    def reject(self, reason: str, retry_after: float):
+        logger.warning(f"Exception: login rejected, {reason}")
+        headers = {"Retry-After": str(math.ceil(retry_after))}
+        raise HTTPException(status.HTTP_429_TOO_MANY_REQUESTS, "Too many login attempts", headers=headers)
+
+    @asynccontextmanager
+    async def admit(self, username: str, client_ip: str):
+        if self.in_flight >= self.max_concurrent:
+            self.reject("too many concurrent logins", 1)
+
+        retry_after = self.ip_limiter.hit(client_ip)
+        if retry_after:
+            self.reject(f"rate limit for ip {client_ip}", retry_after)
+
+        retry_after = self.username_limiter.hit(username)
+        if retry_after:
+            self.reject(f"rate limit for username {username}", retry_after)
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def clear(self):
+        self.username_limiter.clear()
+        self.ip_limiter.clear()
+
+
+@lru_cache()
+def get_login_admission() -> LoginAdmission:
+    username_limiter = GCRALimiter(
+        settings.LOGIN_USERNAME_RATE_PER_MINUTE, settings.LOGIN_USERNAME_BURST, settings.LOGIN_LIMITER_MAX_KEYS
+    )
+    ip_limiter = GCRALimiter(
+        settings.LOGIN_IP_RATE_PER_MINUTE, settings.LOGIN_IP_BURST, settings.LOGIN_LIMITER_MAX_KEYS
+    )
+    return LoginAdmission(username_limiter, ip_limiter, settings.LOGIN_MAX_CONCURRENT)
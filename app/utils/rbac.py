@@ -1,11 +1,18 @@
 import functools
+from typing import Callable
 
 from fastapi import HTTPException, status
+from sqlalchemy import ColumnElement, select
+
+from app.db.models import Task, UserTask
+
+
+ADMIN_ROLE = "admin"
 
 
 class PermissionChecker:
     def __init__(self, access_roles):
-        self.access_roles = access_roles
+        self.access_roles = frozenset(access_roles)
 
     def __call__(self, func):
         @functools.wraps(func)
@@ -17,10 +24,10 @@ class PermissionChecker:
             if current_user is None:
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized")
 
-            if "admin" in current_user.roles:
+            if ADMIN_ROLE in current_user.roles:
                 return await func(*args, **kwargs)
 
-            if user_id is None and not any(role in self.access_roles for role in current_user.roles):
+            if user_id is None and self.access_roles.isdisjoint(current_user.roles):
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
 
             if user_id is not None:
@@ -32,3 +39,19 @@ class PermissionChecker:
             return await func(*args, **kwargs)
 
         return wrapper
+
+
+class RowPolicy:
+    def __init__(self, bypass_roles, predicate: Callable[..., ColumnElement[bool]]):
+        self.bypass_roles = frozenset(bypass_roles)
+        self.predicate = predicate
+
+    def conditions(self, principal) -> tuple:
+        if not self.bypass_roles.isdisjoint(principal.roles):
+            return ()
+        return (self.predicate(principal),)
+
+
+assigned_tasks_policy = RowPolicy(
+    [ADMIN_ROLE], lambda principal: Task.id.in_(select(UserTask.task_id).where(UserTask.user_id == principal.id))
+)
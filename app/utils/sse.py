@@ -0,0 +1,34 @@
+import asyncio
+from typing import AsyncIterator, Optional
+
+from app.utils.websocket import ConnectionManager, EventStream
+
+
+def format_event(seq: Optional[int], frame: str) -> str:
+    if seq is None:
+        return f"data: {frame}\n\n"
+    return f"id: {seq}\ndata: {frame}\n\n"
+
+
+async def stream_events(
+    ws_manager: ConnectionManager,
+    topics: set,
+    last_seq: Optional[int],
+    keep_alive: float,
+    scope: Optional[set] = None,
+) -> AsyncIterator[str]:
+    stream = EventStream()
+    client = await ws_manager.open_stream(stream, topics, last_seq, scope)
+    try:
+        yield ": connected\n\n"
+        while not stream.closed:
+            try:
+                seq, frame = await asyncio.wait_for(client.queue.get(), keep_alive)
+            except TimeoutError:
+                chunk = ": keep-alive\n\n"
+            else:
+                chunk = format_event(seq, frame)
+            ws_manager.touch(client)
+            yield chunk
+    finally:
+        await ws_manager.disconnect(stream)
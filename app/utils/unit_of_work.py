@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 
 from app.db.database import async_session_maker
+from app.repositories.refresh_token_repository import RefreshTokenRepository
+from app.repositories.task_event_repository import TaskEventRepository
 from app.repositories.task_repository import TaskRepository
 from app.repositories.user_repository import UserRepository
 
@@ -8,6 +10,8 @@ from app.repositories.user_repository import UserRepository
 class IUnitOfWork(ABC):
     task_repo: TaskRepository
     user_repo: UserRepository
+    refresh_token_repo: RefreshTokenRepository
+    task_event_repo: TaskEventRepository
 
     @abstractmethod
     async def __aenter__(self):
@@ -34,6 +38,8 @@ class UnitOfWork(IUnitOfWork):
         self.session = self.session_maker()
         self.user_repo = UserRepository(self.session)
         self.task_repo = TaskRepository(self.session)
+        self.refresh_token_repo = RefreshTokenRepository(self.session)
+        self.task_event_repo = TaskEventRepository(self.session)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
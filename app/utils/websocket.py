@@ -1,29 +1,491 @@
-from functools import lru_cache
+import asyncio
+import itertools
+import time
+from collections import OrderedDict, defaultdict
+from enum import StrEnum
+from functools import lru_cache, partial
+from typing import Awaitable, Callable, Hashable, Optional
 
-from fastapi import WebSocket
+import msgpack
+import orjson
+from fastapi import WebSocket, status
 
-from logger import logging_decorator
+from app.api.schemas.websocket import Subscription
+from app.core.config import settings
+from app.db.database import async_session_maker
+from app.utils.broadcast import BroadcastBackend, LocalBroadcastBackend, PostgresBroadcastBackend
+from app.utils.event_log import EventLog
+from app.utils.unit_of_work import UnitOfWork
+from logger import logger
 
 
-class ConnectionManager:
+class Encoding(StrEnum):
+    JSON = "json"
+    MSGPACK = "msgpack"
+
+
+encoders: dict[Encoding, Callable[[dict], str | bytes]] = {
+    Encoding.JSON: lambda message: orjson.dumps(message).decode(),
+    Encoding.MSGPACK: lambda message: msgpack.packb(message),
+}
+
+
+def negotiate_encoding(websocket: WebSocket, encoding: Optional[Encoding]) -> tuple[Encoding, Optional[str]]:
+    if Encoding.MSGPACK in websocket.scope.get("subprotocols", ()):
+        return Encoding.MSGPACK, Encoding.MSGPACK.value
+    return encoding or Encoding.JSON, None
+
+
+class WebSocketClient:
+    __slots__ = (
+        "websocket",
+        "queue",
+        "loop",
+        "writer",
+        "closer",
+        "topics",
+        "scope",
+        "backlog",
+        "last_seen",
+        "encoding",
+    )
+
+    def __init__(self, websocket: WebSocket, queue_size: int, encoding: Encoding = Encoding.JSON):
+        self.websocket = websocket
+        self.encoding = encoding
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.loop = asyncio.get_running_loop()
+        self.writer: Optional[asyncio.Task] = None
+        self.closer: Optional[asyncio.Task] = None
+        self.topics: set[tuple[str, int | str]] = set()
+        self.scope: Optional[set[tuple[str, int | str]]] = None
+        self.backlog: Optional[list[tuple[Optional[int], str]]] = None
+        self.last_seen = time.monotonic()
+
+    def accepts(self, topics: set[tuple[str, int | str]]) -> bool:
+        return self.scope is None or not self.scope.isdisjoint(topics)
+
+    def selects(self, topics: set[tuple[str, int | str]]) -> bool:
+        return not self.topics.isdisjoint(topics) and self.accepts(topics)
+
+    def start(self):
+        self.writer = self.loop.create_task(self.write())
+
+    def stop(self):
+        if self.writer is not None:
+            self.writer.cancel()
+
+    async def write(self):
+        while True:
+            seq, frame = await self.queue.get()
+            try:
+                if isinstance(frame, bytes):
+                    await self.websocket.send_bytes(frame)
+                else:
+                    await self.websocket.send_text(frame)
+            except Exception as e:
+                logger.warning(f"Exception: websocket send failed: {e!r}")
+                return
+
+    async def close(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception as e:
+            logger.warning(f"Exception: websocket close failed: {e!r}")
+
+
+class EventStream:
     def __init__(self):
-        self.active_connections: list[WebSocket] = []
+        self.closed = False
+
+    async def close(self, code: int):
+        self.closed = True
+
+
+class EventCoalescer:
+    def __init__(self, window: float, publish: Callable[[dict], Awaitable]):
+        self.window = window
+        self.publish = publish
+        self.pending: dict[Hashable, dict] = {}
+        self.flusher: Optional[asyncio.Task] = None
+        self.counter = itertools.count()
+        self.received_events = 0
+        self.coalesced_events = 0
+        self.flushed_frames = 0
+
+    def add(self, message: dict):
+        self.received_events += 1
+        key = self.get_key(message)
+        if self.pending.pop(key, None) is not None:
+            self.coalesced_events += 1
+        self.pending[key] = message
+        if self.flusher is None:
+            self.flusher = asyncio.get_running_loop().create_task(self.flush_later())
+
+    def get_key(self, message: dict) -> Hashable:
+        task = message.get("task")
+        if task is None:
+            return next(self.counter)
+        return message.get("event"), task["id"]
+
+    async def flush_later(self):
+        await asyncio.sleep(self.window)
+        self.flusher = None
+        await self.flush()
+
+    def merge(self, messages: list[dict]) -> Optional[dict]:
+        merged: dict[Hashable, dict] = {}
+        for message in messages:
+            self.received_events += 1
+            key = self.get_key(message)
+            if merged.pop(key, None) is not None:
+                self.coalesced_events += 1
+            merged[key] = message
+        return self.pack(list(merged.values()))
+
+    async def flush(self):
+        message = self.pack(list(self.pending.values()))
+        self.pending.clear()
+        if message is not None:
+            await self.publish(message)
+
+    def pack(self, events: list[dict]) -> Optional[dict]:
+        if not events:
+            return None
+
+        self.flushed_frames += 1
+        if len(events) == 1:
+            return events[0]
+        return {"event": "batch", "events": events}
+
+    async def close(self):
+        if self.flusher is not None:
+            self.flusher.cancel()
+            self.flusher = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self.pending),
+            "received": self.received_events,
+            "coalesced": self.coalesced_events,
+            "frames": self.flushed_frames,
+        }
+
+
+class ConnectionManager:
+    def __init__(
+        self,
+        queue_size: int,
+        backend: BroadcastBackend,
+        coalesce_window: float = 0,
+        event_log: Optional[EventLog] = None,
+        idle_timeout: float = 0,
+    ):
+        self.queue_size = queue_size
+        self.backend = backend
+        self.event_log = event_log
+        self.idle_timeout = idle_timeout
+        self.reaper: Optional[asyncio.Task] = None
+        self.coalescer = EventCoalescer(coalesce_window, self.publish) if coalesce_window > 0 else None
+        self.active_connections: OrderedDict[WebSocket, WebSocketClient] = OrderedDict()
+        self.subscribers: defaultdict[tuple[str, int | str], set[WebSocketClient]] = defaultdict(set)
+        self.unfiltered: set[WebSocketClient] = set()
+        self.dropped_connections = 0
+        self.reaped_connections = 0
+
+    async def start(self):
+        await self.backend.start(self.deliver)
+        if self.idle_timeout > 0:
+            self.reaper = asyncio.get_running_loop().create_task(self.reap())
+
+    async def stop(self):
+        if self.reaper is not None:
+            self.reaper.cancel()
+            self.reaper = None
+        if self.coalescer is not None:
+            await self.coalescer.close()
+        await self.backend.stop()
+
+    def register(
+        self, websocket: WebSocket, last_seq: Optional[int], encoding: Encoding = Encoding.JSON
+    ) -> WebSocketClient:
+        client = WebSocketClient(websocket, self.queue_size, encoding)
+        if last_seq is not None and self.event_log is not None:
+            client.backlog = []
+        self.active_connections[websocket] = client
+        self.unfiltered.add(client)
+        return client
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        last_seq: Optional[int] = None,
+        encoding: Encoding = Encoding.JSON,
+        subprotocol: Optional[str] = None,
+    ):
+        client = self.register(websocket, last_seq, encoding)
+        try:
+            await websocket.accept(subprotocol=subprotocol)
+        except Exception:
+            self.active_connections.pop(websocket, None)
+            self.unfiltered.discard(client)
+            raise
+        client.start()
+        if client.backlog is not None:
+            await self.replay(client, last_seq)
 
-    @logging_decorator()
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+    async def open_stream(
+        self, stream: EventStream, topics: set, last_seq: Optional[int] = None, scope: Optional[set] = None
+    ) -> WebSocketClient:
+        client = self.register(stream, last_seq)
+        client.scope = scope
+        self.add_topics(client, topics or scope or set())
+        if client.backlog is not None:
+            await self.replay(client, last_seq)
+        return client
+
+    async def replay(self, client: WebSocketClient, last_seq: int):
+        events = await self.event_log.get_since(last_seq)
+        backlog, client.backlog = client.backlog, None
+        if events is None:
+            self.send(client, {"event": "resync_required"})
+        elif events:
+            last_seq = max(last_seq, events[-1]["seq"])
+            if client.topics:
+                events = [event for event in events if client.selects(self.get_message_topics(event))]
+
+        if events:
+            message = events[0] if len(events) == 1 else {"event": "batch", "events": events}
+            self.send(client, message, last_seq)
+
+        for seq, frame in backlog:
+            if seq is None or seq > last_seq:
+                self.enqueue(client, frame, seq)
 
-    @logging_decorator()
     async def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        client = self.active_connections.pop(websocket, None)
+        if client is not None:
+            self.unfiltered.discard(client)
+            self.remove_topics(client, set(client.topics))
+            client.stop()
+
+    def handle_message(self, websocket: WebSocket, message: str | bytes):
+        client = self.active_connections.get(websocket)
+        if client is None:
+            return
+
+        self.touch(client)
+        try:
+            subscription = self.parse_subscription(message)
+        except ValueError:
+            logger.warning(f"Exception: wrong websocket message {message[:100]!r}")
+            self.send(client, {"event": "error", "detail": "Wrong message"})
+            return
+
+        if subscription.action == "ping":
+            self.send(client, {"event": "pong"})
+            return
+
+        topics = subscription.get_topics()
+        if subscription.action == "subscribe":
+            self.add_topics(client, topics)
+        else:
+            self.remove_topics(client, topics)
+        ack = {"event": f"{subscription.action}d", **subscription.model_dump(exclude={"action"})}
+        self.send(client, ack)
+
+    @staticmethod
+    def parse_subscription(message: str | bytes) -> Subscription:
+        if isinstance(message, bytes):
+            return Subscription.model_validate(msgpack.unpackb(message))
+        return Subscription.model_validate_json(message)
+
+    def touch(self, client: WebSocketClient):
+        client.last_seen = time.monotonic()
+        if client.websocket in self.active_connections:
+            self.active_connections.move_to_end(client.websocket)
+
+    def add_topics(self, client: WebSocketClient, topics: set):
+        client.topics.update(topics)
+        for topic in topics:
+            self.subscribers[topic].add(client)
+        if client.topics:
+            self.unfiltered.discard(client)
+
+    def remove_topics(self, client: WebSocketClient, topics: set):
+        client.topics.difference_update(topics)
+        for topic in topics:
+            subscribers = self.subscribers.get(topic)
+            if subscribers is None:
+                continue
+            subscribers.discard(client)
+            if not subscribers:
+                del self.subscribers[topic]
+        if not client.topics and client.websocket in self.active_connections:
+            self.unfiltered.add(client)
+
+    def get_recipients(self, message: dict) -> list[WebSocketClient]:
+        topics = self.get_message_topics(message)
+        recipients = set(self.unfiltered)
+        for topic in topics:
+            recipients.update(self.subscribers.get(topic, ()))
+        return [client for client in recipients if client.accepts(topics)]
+
+    @staticmethod
+    def get_message_topics(message: dict) -> set[tuple[str, int | str]]:
+        topics = set()
+        if "event" in message:
+            topics.add(("event", message["event"]))
+
+        tasks = message.get("tasks", [])
+        if "task" in message:
+            tasks = [message["task"], *tasks]
+        for task in tasks:
+            topics.add(("task", task["id"]))
+            topics.update(("user", user["id"]) for user in task.get("users", []))
+
+        topics.update(("user", user_id) for user_id in message.get("user_ids", []))
+        for assignment in message.get("assignments", []):
+            topics.add(("task", assignment["task_id"]))
+            topics.add(("user", assignment["user_id"]))
+        return topics
 
-    @logging_decorator()
     async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            await connection.send_json(message)
+        if self.coalescer is not None:
+            self.coalescer.add(message)
+        else:
+            await self.publish(message)
+
+    async def publish_events(self, messages: list[dict]):
+        if self.coalescer is None:
+            for message in messages:
+                await self.publish(message)
+            return
+
+        message = self.coalescer.merge(messages)
+        if message is not None:
+            await self.publish(message)
+
+    async def publish(self, message: dict):
+        frame = orjson.dumps(message).decode()
+        await self.backend.publish(message, frame)
+
+    def deliver(self, message: dict, frame: str):
+        events = message["events"] if message.get("event") == "batch" else [message]
+        if self.event_log is not None:
+            for event in events:
+                self.event_log.record(event)
+
+        if len(events) > 1:
+            frames = self.get_batch_frames(events, frame)
+        else:
+            encoded = {Encoding.JSON: frame}
+            frames = [
+                (client, self.get_frame(encoded, message, client.encoding)) for client in self.get_recipients(message)
+            ]
+        seq = max((event["seq"] for event in events if "seq" in event), default=None)
+
+        loop = asyncio.get_running_loop()
+        for client, client_frame in frames:
+            if client.loop is loop:
+                self.enqueue(client, client_frame, seq)
+            else:
+                client.loop.call_soon_threadsafe(self.enqueue, client, client_frame, seq)
+
+    def get_batch_frames(self, events: list[dict], frame: str) -> list[tuple[WebSocketClient, str | bytes]]:
+        selected: defaultdict[WebSocketClient, list[int]] = defaultdict(list)
+        for index, event in enumerate(events):
+            topics = self.get_message_topics(event)
+            recipients = set()
+            for topic in topics:
+                recipients.update(self.subscribers.get(topic, ()))
+            for client in recipients:
+                if client.accepts(topics):
+                    selected[client].append(index)
+
+        full_batch = {"event": "batch", "events": events}
+        encoded = {Encoding.JSON: frame}
+        frames = [(client, self.get_frame(encoded, full_batch, client.encoding)) for client in self.unfiltered]
+        batches = {tuple(range(len(events))): (full_batch, encoded)}
+        for client, indexes in selected.items():
+            key = tuple(indexes)
+            if key not in batches:
+                batch = [events[index] for index in indexes]
+                batches[key] = (batch[0] if len(batch) == 1 else {"event": "batch", "events": batch}, {})
+            message, encoded = batches[key]
+            frames.append((client, self.get_frame(encoded, message, client.encoding)))
+        return frames
+
+    @staticmethod
+    def get_frame(encoded: dict[Encoding, str | bytes], message: dict, encoding: Encoding) -> str | bytes:
+        frame = encoded.get(encoding)
+        if frame is None:
+            frame = encoded[encoding] = encoders[encoding](message)
+        return frame
+
+    def send(self, client: WebSocketClient, message: dict, seq: Optional[int] = None):
+        self.enqueue(client, encoders[client.encoding](message), seq)
+
+    def enqueue(self, client: WebSocketClient, frame: str | bytes, seq: Optional[int] = None):
+        if client.backlog is not None:
+            client.backlog.append((seq, frame))
+            return
+        try:
+            client.queue.put_nowait((seq, frame))
+        except asyncio.QueueFull:
+            self.drop(client)
+
+    def drop(self, client: WebSocketClient):
+        if self.remove(client, status.WS_1013_TRY_AGAIN_LATER):
+            self.dropped_connections += 1
+            logger.warning(f"Exception: websocket client dropped, {self.queue_size} messages not sent")
+
+    def remove(self, client: WebSocketClient, code: int) -> bool:
+        if self.active_connections.pop(client.websocket, None) is None:
+            return False
+
+        self.unfiltered.discard(client)
+        self.remove_topics(client, set(client.topics))
+        client.stop()
+        client.closer = client.loop.create_task(client.close(code))
+        return True
+
+    async def reap(self):
+        while True:
+            await asyncio.sleep(self.idle_timeout / 2)
+            self.reap_idle(time.monotonic() - self.idle_timeout)
+
+    def reap_idle(self, deadline: float) -> int:
+        reaped = 0
+        while self.active_connections:
+            client = next(iter(self.active_connections.values()))
+            if client.last_seen > deadline:
+                break
+            self.remove(client, status.WS_1001_GOING_AWAY)
+            reaped += 1
+
+        self.reaped_connections += reaped
+        if reaped:
+            logger.info(f"Reaped {reaped} idle websocket connections")
+        return reaped
+
+
+def get_broadcast_backend() -> BroadcastBackend:
+    if settings.WS_BROADCAST_BACKEND == "postgres":
+        return PostgresBroadcastBackend(settings.DATABASE_DSN, settings.WS_BROADCAST_CHANNEL)
+    return LocalBroadcastBackend()
 
 
 @lru_cache()
 def get_ws_manager() -> ConnectionManager:
-    return ConnectionManager()
+    event_log = EventLog(
+        partial(UnitOfWork, async_session_maker), settings.WS_REPLAY_BUFFER_SIZE, settings.WS_REPLAY_MAX_EVENTS
+    )
+    return ConnectionManager(
+        settings.WS_SEND_QUEUE_SIZE,
+        get_broadcast_backend(),
+        settings.WS_COALESCE_WINDOW_MS / 1000,
+        event_log,
+        settings.WS_IDLE_TIMEOUT_SECONDS,
+    )
@@ -0,0 +1,30 @@
+import argparse
+import asyncio
+import time
+
+from app.core.security import create_access_token, decode_token, get_current_user_id
+from app.utils.cache import TTLCache
+
+
+async def run_chain(token: str, token_cache: TTLCache, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        payload = await decode_token(token, token_cache)
+        await get_current_user_id(payload)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+async def main(requests: int):
+    token = create_access_token({"sub": "1", "roles": ["user"], "ver": 0})
+
+    uncached = await run_chain(token, TTLCache(max_size=0, ttl=0), requests)
+    cached = await run_chain(token, TTLCache(max_size=10000, ttl=60), requests)
+    print(f"without cache: {uncached:.2f} us/request")
+    print(f"with cache:    {cached:.2f} us/request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cost of the auth dependency chain with and without the token cache")
+    parser.add_argument("--requests", type=int, default=100000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
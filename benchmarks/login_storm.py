@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.security import PasswordHasher, get_password_hash, verify_password
+
+
+TICK_SECONDS = 0.01
+
+
+async def measure_loop_lag(stop: asyncio.Event) -> list[float]:
+    lags = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append((time.perf_counter() - started - TICK_SECONDS) * 1000)
+    return lags
+
+
+async def inline_login(hashed_password: str):
+    verify_password("password", hashed_password)
+
+
+async def run_storm(logins: int, login, hashed_password: str) -> dict:
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(login(hashed_password) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lags = await lag_task
+    lags.sort()
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "lag_p50_ms": round(statistics.median(lags), 2),
+        "lag_p99_ms": round(lags[int(len(lags) * 0.99)], 2),
+        "lag_max_ms": round(lags[-1], 2),
+        "ticks": len(lags),
+    }
+
+
+async def main(logins: int, workers: int, concurrency: int):
+    hashed_password = get_password_hash("password")
+    hasher = PasswordHasher(workers=workers, concurrency=concurrency, queue_timeout=60)
+
+    async def offloaded_login(hashed_password: str):
+        await hasher.verify("password", hashed_password)
+
+    await offloaded_login(hashed_password)
+    print("inline:   ", await run_storm(logins, inline_login, hashed_password))
+    print("offloaded:", await run_storm(logins, offloaded_login, hashed_password))
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Event-loop latency during a login storm")
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.workers, args.concurrency))
@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import logging
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+import uvicorn
+import websockets
+from fastapi import FastAPI
+
+from app.api.endpoints.websocket import ws_router
+from app.utils.websocket import get_ws_manager
+from benchmarks.ws_fanout import make_event
+from logger import logger
+
+
+def raise_open_files_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def get_rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status_file:
+        for line in status_file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def create_app() -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        ws_manager = get_ws_manager()
+        await ws_manager.start()
+        yield
+        await ws_manager.stop()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(ws_router)
+
+    @app.post("/broadcast/")
+    async def broadcast():
+        ws_manager = get_ws_manager()
+        await ws_manager.broadcast({**make_event(1), "sent_at": time.time()})
+        return {"connections": len(ws_manager.active_connections)}
+
+    return app
+
+
+def serve(port: int):
+    raise_open_files_limit()
+    logger.setLevel(logging.WARNING)
+    uvicorn.run(create_app(), host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+
+
+async def wait_for_server(client: httpx.AsyncClient):
+    for _ in range(100):
+        try:
+            await client.post("/broadcast/")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def open_connections(url: str, count: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def open_one():
+        async with semaphore:
+            return await websockets.connect(url, ping_interval=None, max_queue=None)
+
+    return await asyncio.gather(*(open_one() for _ in range(count)))
+
+
+async def measure_broadcast(client: httpx.AsyncClient, connections: list) -> list[float]:
+    started = time.perf_counter()
+    receivers = [asyncio.create_task(connection.recv()) for connection in connections]
+    await client.post("/broadcast/")
+    latencies = []
+    for receiver in asyncio.as_completed(receivers):
+        await receiver
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def main(connections_count: int, broadcasts: int, port: int, concurrency: int):
+    raise_open_files_limit()
+    server = subprocess.Popen([sys.executable, "-m", "benchmarks.ws_connections", "--serve", "--port", str(port)])
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            await wait_for_server(client)
+            rss_before = get_rss_kb(server.pid)
+
+            started = time.perf_counter()
+            connections = await open_connections(f"ws://127.0.0.1:{port}/ws/tasks/", connections_count, concurrency)
+            connect_time = time.perf_counter() - started
+            await asyncio.sleep(1)
+            rss_after = get_rss_kb(server.pid)
+
+            results = [await measure_broadcast(client, connections) for _ in range(broadcasts)]
+            await asyncio.gather(*(connection.close() for connection in connections))
+    finally:
+        server.terminate()
+        server.wait()
+
+    first = [statistics.median(latencies) for latencies in results]
+    last = [latencies[-1] for latencies in results]
+    print(f"connections:               {connections_count}")
+    print(f"connect time, s:           {connect_time:.2f}")
+    print(f"server RSS growth, MB:     {(rss_after - rss_before) / 1024:.1f}")
+    print(f"memory per connection, KB: {(rss_after - rss_before) / connections_count:.1f}")
+    print(f"broadcast p50 client, ms:  {statistics.median(first):.1f}")
+    print(f"broadcast last client, ms: {statistics.median(last):.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory per idle WebSocket connection and broadcast latency")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--broadcasts", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--serve", action="store_true")
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.port)
+    else:
+        asyncio.run(main(args.connections, args.broadcasts, args.port, args.concurrency))
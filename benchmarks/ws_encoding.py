@@ -0,0 +1,52 @@
+import argparse
+import time
+import zlib
+
+import msgpack
+import orjson
+
+from app.utils.websocket import Encoding, encoders
+from benchmarks.ws_fanout import make_event
+
+
+decoders = {Encoding.JSON: orjson.loads, Encoding.MSGPACK: msgpack.unpackb}
+
+
+def deflate_size(frame: str | bytes) -> int:
+    data = frame.encode() if isinstance(frame, str) else frame
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return len(compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH))
+
+
+def measure(encoding: Encoding, message: dict, repeat: int) -> tuple[int, int, float, float]:
+    encode, decode = encoders[encoding], decoders[encoding]
+    frame = encode(message)
+    size = len(frame.encode()) if isinstance(frame, str) else len(frame)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        encode(message)
+    encode_time = (time.perf_counter() - started) / repeat * 1_000_000
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        decode(frame)
+    decode_time = (time.perf_counter() - started) / repeat * 1_000_000
+    return size, deflate_size(frame), encode_time, decode_time
+
+
+def main(batch: int, repeat: int):
+    events = [make_event(task_id) for task_id in range(batch)]
+    message = events[0] if batch == 1 else {"event": "batch", "events": events}
+    print(f"{'encoding':>10} {'bytes':>8} {'deflated':>9} {'encode, us':>11} {'decode, us':>11}")
+    for encoding in Encoding:
+        size, deflated, encode_time, decode_time = measure(encoding, message, repeat)
+        print(f"{encoding:>10} {size:>8} {deflated:>9} {encode_time:>11.2f} {decode_time:>11.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Frame size and codec cost of JSON and MessagePack task events")
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=10000)
+    args = parser.parse_args()
+    main(args.batch, args.repeat)
@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
+
+from app.utils.broadcast import LocalBroadcastBackend
+from app.utils.websocket import ConnectionManager
+from logger import logger
+
+
+class NullWebSocket:
+    def __init__(self, done: asyncio.Event, remaining: list[int]):
+        self.done = done
+        self.remaining = remaining
+
+    async def accept(self, subprotocol: Optional[str] = None):
+        pass
+
+    async def send_text(self, frame: str):
+        self.remaining[0] -= 1
+        if not self.remaining[0]:
+            self.done.set()
+
+
+def make_event(task_id: int) -> dict:
+    task = {
+        "id": task_id,
+        "title": f"task {task_id}",
+        "description": "description " * 10,
+        "status": "in_progress",
+        "created_at": "2025-01-01T00:00:00",
+        "completed_at": None,
+        "users": [{"id": user_id, "username": f"user{user_id}", "roles": ["user"]} for user_id in range(5)],
+    }
+    return {"event": "task_updated", "task": task}
+
+
+def per_subscriber_cost(subscribers: int, events: int) -> float:
+    started = time.perf_counter()
+    for task_id in range(events):
+        message = make_event(task_id)
+        for _ in range(subscribers):
+            json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+    return (time.perf_counter() - started) / events * 1000
+
+
+async def shared_frame_cost(subscribers: int, events: int) -> float:
+    done = asyncio.Event()
+    remaining = [subscribers * events]
+    ws_manager = ConnectionManager(events, LocalBroadcastBackend())
+    await ws_manager.start()
+    websockets = [NullWebSocket(done, remaining) for _ in range(subscribers)]
+    for websocket in websockets:
+        await ws_manager.connect(websocket)
+
+    started = time.perf_counter()
+    for task_id in range(events):
+        await ws_manager.broadcast(make_event(task_id))
+    await done.wait()
+    elapsed = time.perf_counter() - started
+
+    for websocket in websockets:
+        await ws_manager.disconnect(websocket)
+    return elapsed / events * 1000
+
+
+async def main(subscribers: list[int], events: int):
+    logger.setLevel(logging.WARNING)
+    print(f"{'subscribers':>12} {'json per subscriber, ms':>24} {'orjson once + fan-out, ms':>26}")
+    for count in subscribers:
+        before = per_subscriber_cost(count, events)
+        after = await shared_frame_cost(count, events)
+        print(f"{count:>12} {before:>24.3f} {after:>26.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cost of fanning out one task event to N WebSocket subscribers")
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--events", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.subscribers, args.events))
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 
@@ -5,10 +7,25 @@ from app.api.endpoints.tasks import tasks_router
 from app.api.endpoints.users import users_router
 from app.api.endpoints.websocket import ws_router
 from app.core.config import settings
+from app.core.security import get_password_hasher
+from app.utils.outbox import get_outbox_dispatcher
+from app.utils.websocket import get_ws_manager
 from logger import LoggingMiddleware
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ws_manager = get_ws_manager()
+    outbox = get_outbox_dispatcher()
+    await ws_manager.start()
+    await outbox.start()
+    yield
+    await outbox.stop()
+    await ws_manager.stop()
+    get_password_hasher().shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(users_router)
 app.include_router(tasks_router)
@@ -24,4 +41,12 @@ else:
 
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+        ws_ping_interval=settings.WS_PING_INTERVAL_SECONDS,
+        ws_ping_timeout=settings.WS_PING_TIMEOUT_SECONDS,
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
+    )
@@ -13,6 +13,15 @@ from app.core.dependencies import get_current_user
 from app.db.database import Base
 from app.services.task_service import TaskService, get_task_service
 from app.services.user_service import UserService, get_user_service
+from app.utils.cache import (
+    RevocationStore,
+    TTLCache,
+    get_principal_cache,
+    get_revoked_sessions,
+    get_token_cache,
+    get_token_version_cache,
+)
+from app.utils.rate_limit import get_login_admission
 from app.utils.unit_of_work import UnitOfWork
 from app.utils.websocket import get_ws_manager
 from main import app
@@ -91,10 +100,10 @@ def user_with_tasks(user_data):
 @pytest.fixture
 def user_with_password(user_data):
     db_data = user_data.copy()
-    db_data.update({"id": 1, "tasks": []})
+    db_data.update({"id": 1, "tasks": [], "token_version": 0})
 
     user = MagicMock()
-    [setattr(user, key, val) for key, val in user_data.items()]
+    [setattr(user, key, val) for key, val in db_data.items()]
     return user
 
 
@@ -102,10 +111,14 @@ def user_with_password(user_data):
 def mock_task_repo():
     repo = AsyncMock()
     repo.add_one = AsyncMock()
+    repo.add_many = AsyncMock()
     repo.find_one = AsyncMock()
     repo.find_all = AsyncMock()
     repo.update_one = AsyncMock()
     repo.remove_one = AsyncMock()
+    repo.add_assignments = AsyncMock()
+    repo.remove_assignments = AsyncMock()
+    repo.get_assignee_ids = AsyncMock(return_value=[])
     return repo
 
 
@@ -113,10 +126,29 @@ def mock_task_repo():
 def mock_user_repo():
     repo = AsyncMock()
     repo.add_one = AsyncMock()
+    repo.add_many = AsyncMock()
     repo.find_one = AsyncMock()
     repo.find_all = AsyncMock()
     repo.update_one = AsyncMock()
     repo.remove_one = AsyncMock()
+    repo.get_token_version = AsyncMock()
+    return repo
+
+
+@pytest.fixture
+def mock_refresh_token_repo():
+    repo = AsyncMock()
+    repo.add_one = AsyncMock()
+    repo.rotate = AsyncMock()
+    repo.revoke_session = AsyncMock()
+    return repo
+
+
+@pytest.fixture
+def mock_task_event_repo():
+    repo = AsyncMock()
+    repo.add_one = AsyncMock()
+    repo.find_since = AsyncMock()
     return repo
 
 
@@ -132,53 +164,60 @@ class AsyncContextManagerMock:
 
 
 @pytest.fixture
-def mock_uow(mock_task_repo, mock_user_repo):
+def mock_uow(mock_task_repo, mock_user_repo, mock_refresh_token_repo, mock_task_event_repo):
     uow = AsyncMock()
     uow.task_repo = mock_task_repo
     uow.user_repo = mock_user_repo
+    uow.refresh_token_repo = mock_refresh_token_repo
+    uow.task_event_repo = mock_task_event_repo
     uow.commit = AsyncMock()
     return AsyncContextManagerMock(uow)
 
 
 @pytest.fixture
-def mock_ws_manager():
-    ws_manager = AsyncMock()
-    ws_manager.broadcast = AsyncMock()
-    return ws_manager
+def mock_outbox():
+    outbox = MagicMock()
+    outbox.notify = MagicMock()
+    return outbox
 
 
 @pytest.fixture
-def task_service(mock_uow, mock_ws_manager):
-    return TaskService(mock_uow, mock_ws_manager)
+def task_service(mock_uow, mock_outbox):
+    return TaskService(mock_uow, mock_outbox)
 
 
 @pytest.fixture
 def user_service(mock_uow):
-    return UserService(mock_uow)
+    return UserService(mock_uow, TTLCache(max_size=10, ttl=60), TTLCache(max_size=10, ttl=60), RevocationStore())
 
 
 @pytest.fixture
 def mock_task_service():
     task_service = AsyncMock()
-    task_service.get_tasks = AsyncMock(return_value=[])
+    task_service.get_tasks = AsyncMock(return_value={"items": [], "next_cursor": None})
     task_service.get_task = AsyncMock()
+    task_service.get_event_topics = AsyncMock(return_value=(set(), None))
     task_service.create_task = AsyncMock()
+    task_service.create_tasks = AsyncMock()
     task_service.delete_task = AsyncMock()
     task_service.update_task = AsyncMock()
     task_service.assign_task = AsyncMock()
     task_service.unassign_task = AsyncMock()
+    task_service.assign_tasks = AsyncMock()
+    task_service.unassign_tasks = AsyncMock()
     return task_service
 
 
 @pytest.fixture
 def mock_user_service():
     user_service = AsyncMock()
-    user_service.get_users = AsyncMock(return_value=[])
+    user_service.get_users = AsyncMock(return_value={"items": [], "next_cursor": None})
     user_service.get_user = AsyncMock()
     user_service.create_user = AsyncMock()
     user_service.delete_user = AsyncMock()
     user_service.update_user = AsyncMock()
     user_service.login_user = AsyncMock()
+    user_service.refresh_token = AsyncMock()
     return user_service
 
 
@@ -197,6 +236,7 @@ async def mock_app(mock_user_service, mock_task_service, user_with_password):
     app.dependency_overrides[get_user_service] = get_test_user_service
     app.dependency_overrides[get_task_service] = get_test_task_service
     app.dependency_overrides[get_current_user] = get_test_admin
+    get_login_admission().clear()
     yield app
 
 
@@ -215,7 +255,13 @@ async def test_task_service(test_uow):
 
 @pytest.fixture
 async def test_user_service(test_uow):
-    return UserService(test_uow)
+    principal_cache = get_principal_cache()
+    principal_cache.clear()
+    token_versions = get_token_version_cache()
+    token_versions.clear()
+    revoked_sessions = get_revoked_sessions()
+    revoked_sessions.clear()
+    return UserService(test_uow, principal_cache, token_versions, revoked_sessions)
 
 
 @pytest.fixture
@@ -228,6 +274,8 @@ async def test_app(test_task_service, test_user_service):
 
     app.dependency_overrides[get_task_service] = get_test_task_service
     app.dependency_overrides[get_user_service] = get_test_user_service
+    get_token_cache().clear()
+    get_login_admission().clear()
     yield app
 
 
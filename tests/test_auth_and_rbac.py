@@ -3,7 +3,9 @@ import asyncio
 import pytest
 from fastapi import status
 
+from app.api.schemas.user import UserPrincipal
 from app.core.config import settings
+from app.utils.rbac import assigned_tasks_policy
 
 
 async def create_and_login_user(async_client, user_data):
@@ -11,8 +13,8 @@ async def create_and_login_user(async_client, user_data):
 
     token_data = await async_client.post("/users/login/", json=user_data)
 
-    token, token_type = token_data.json().values()
-    headers = {"Authorization": f"{token_type} {token}"}
+    tokens = token_data.json()
+    headers = {"Authorization": f"{tokens['token_type']} {tokens['access_token']}"}
 
     return headers
 
@@ -36,6 +38,41 @@ async def test_login(async_test_client, user_data):
     assert token_data["token_type"] == "Bearer"
 
 
+@pytest.mark.asyncio
+async def test_refresh_token(async_test_client, user_data):
+    await async_test_client.post("/users/", json=user_data)
+    tokens = (await async_test_client.post("/users/login/", json=user_data)).json()
+
+    response = await async_test_client.post("/users/token/refresh/", json={"refresh_token": tokens["refresh_token"]})
+
+    new_tokens = response.json()
+    headers = {"Authorization": f"{new_tokens['token_type']} {new_tokens['access_token']}"}
+    assert response.status_code == status.HTTP_200_OK
+    assert new_tokens["refresh_token"] != tokens["refresh_token"]
+    assert (await async_test_client.get("/tasks/", headers=headers)).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_reuse(async_test_client, user_data):
+    await async_test_client.post("/users/", json=user_data)
+    tokens = (await async_test_client.post("/users/login/", json=user_data)).json()
+    refresh_data = {"refresh_token": tokens["refresh_token"]}
+    new_tokens = (await async_test_client.post("/users/token/refresh/", json=refresh_data)).json()
+
+    response = await async_test_client.post("/users/token/refresh/", json=refresh_data)
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Token revoked"
+
+    response = await async_test_client.post(
+        "/users/token/refresh/", json={"refresh_token": new_tokens["refresh_token"]}
+    )
+    headers = {"Authorization": f"{new_tokens['token_type']} {new_tokens['access_token']}"}
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert (await async_test_client.get("/tasks/", headers=headers)).status_code == status.HTTP_401_UNAUTHORIZED
+
+
 @pytest.mark.asyncio
 async def test_login_wrong_password(async_test_client, user_data):
     await async_test_client.post("/users/", json=user_data)
@@ -72,6 +109,35 @@ async def test_login_expired_token(async_test_client, user_data, monkeypatch):
     assert response.json()["detail"] == "Token expired"
 
 
+@pytest.mark.asyncio
+async def test_token_revoked_on_role_change(async_test_client, user_data):
+    user_data["roles"].append("admin")
+    headers = await create_and_login_user(async_test_client, user_data)
+    user_data["roles"] = ["user"]
+
+    response = await async_test_client.put("/users/1/", headers=headers, json=user_data)
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await async_test_client.get("/tasks/", headers=headers)
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Token revoked"
+
+
+@pytest.mark.asyncio
+async def test_token_revoked_on_delete(async_test_client, user_data):
+    user_data["roles"].append("admin")
+    headers = await create_and_login_user(async_test_client, user_data)
+
+    response = await async_test_client.delete("/users/1/", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await async_test_client.get("/tasks/", headers=headers)
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Token revoked"
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     "method, uri",
@@ -81,12 +147,16 @@ async def test_login_expired_token(async_test_client, user_data, monkeypatch):
         ["put", "/users/1/"],
         ["delete", "/users/1/"],
         ["get", "/tasks/"],
+        ["get", "/tasks/export/"],
         ["post", "/tasks/"],
+        ["post", "/tasks/bulk/"],
         ["get", "/tasks/1/"],
         ["put", "/tasks/1/"],
         ["delete", "/tasks/1/"],
         ["post", "/tasks/assign/"],
         ["post", "/tasks/unassign/"],
+        ["post", "/tasks/assign/bulk/"],
+        ["post", "/tasks/unassign/bulk/"],
     ),
 )
 async def test_auth_required(async_test_client, method, uri):
@@ -119,12 +189,16 @@ async def test_auth_not_required(async_test_client, method, uri, params, status_
         ["get", "/users/", {}],
         ["put", "/users/1/", {"username": "user", "password": "pass"}],
         ["delete", "/users/1/", {}],
+        ["get", "/tasks/export/", {}],
         ["post", "/tasks/", {"title": "task", "description": "descr"}],
+        ["post", "/tasks/bulk/", [{"title": "task", "description": "descr"}]],
         ["get", "/tasks/1/", {}],
         ["put", "/tasks/1/", {"title": "task", "description": "descr"}],
         ["delete", "/tasks/1/", {}],
         ["post", "/tasks/assign/", {"task_id": 1, "user_id": 1}],
         ["post", "/tasks/unassign/", {"task_id": 1, "user_id": 1}],
+        ["post", "/tasks/assign/bulk/", [{"task_id": 1, "user_id": 1}]],
+        ["post", "/tasks/unassign/bulk/", [{"task_id": 1, "user_id": 1}]],
     ),
 )
 async def test_access_for_user_denied(async_test_client, user_data, method, uri, params):
@@ -165,12 +239,16 @@ async def test_access_for_user(async_test_client, user_data, method, uri, params
         ["delete", "/users/1/", {}, status.HTTP_200_OK],
         ["post", "/users/login/", {"username": "user1", "password": "password"}, status.HTTP_200_OK],
         ["get", "/tasks/", {}, status.HTTP_200_OK],
+        ["get", "/tasks/export/", {}, status.HTTP_200_OK],
         ["post", "/tasks/", {"title": "task", "description": "descr"}, status.HTTP_200_OK],
+        ["post", "/tasks/bulk/", [{"title": "task", "description": "descr"}], status.HTTP_200_OK],
         ["get", "/tasks/1/", {}, status.HTTP_404_NOT_FOUND],
         ["put", "/tasks/1/", {"title": "task", "description": "descr"}, status.HTTP_404_NOT_FOUND],
         ["delete", "/tasks/1/", {}, status.HTTP_404_NOT_FOUND],
         ["post", "/tasks/assign/", {"task_id": 1, "user_id": 1}, status.HTTP_404_NOT_FOUND],
         ["post", "/tasks/unassign/", {"task_id": 1, "user_id": 1}, status.HTTP_404_NOT_FOUND],
+        ["post", "/tasks/assign/bulk/", [{"task_id": 1, "user_id": 1}], status.HTTP_200_OK],
+        ["post", "/tasks/unassign/bulk/", [{"task_id": 1, "user_id": 1}], status.HTTP_200_OK],
     ),
 )
 async def test_access_for_admin(async_test_client, user_data, method, uri, params, status_code):
@@ -180,3 +258,33 @@ async def test_access_for_admin(async_test_client, user_data, method, uri, param
     response = await get_response_with_any_method(async_test_client, method, uri, headers, params)
 
     assert response.status_code == status_code
+
+
+@pytest.mark.parametrize(
+    "roles, conditions_count",
+    (
+        [["user"], 1],
+        [["user", "admin"], 0],
+        [["admin"], 0],
+    ),
+)
+def test_assigned_tasks_policy(roles, conditions_count):
+    conditions = assigned_tasks_policy.conditions(UserPrincipal(id=1, roles=roles))
+
+    assert len(conditions) == conditions_count
+
+
+@pytest.mark.asyncio
+async def test_user_sees_only_assigned_tasks(async_test_client, user_data):
+    admin_data = {"username": "admin", "password": "password", "roles": ["admin"]}
+    admin_headers = await create_and_login_user(async_test_client, admin_data)
+    user_headers = await create_and_login_user(async_test_client, user_data)
+    tasks = [{"title": f"task{i}", "description": "descr"} for i in range(3)]
+    await async_test_client.post("/tasks/bulk/", headers=admin_headers, json=tasks)
+    await async_test_client.post("/tasks/assign/", headers=admin_headers, json={"task_id": 2, "user_id": 2})
+
+    user_response = await async_test_client.get("/tasks/", headers=user_headers)
+    admin_response = await async_test_client.get("/tasks/", headers=admin_headers)
+
+    assert [task["id"] for task in user_response.json()["items"]] == [2]
+    assert [task["id"] for task in admin_response.json()["items"]] == [1, 2, 3]
@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+from app.utils.cache import RevocationStore, TTLCache
+
+
+def test_cache_get_set():
+    cache = TTLCache(max_size=10, ttl=60)
+
+    cache.set("key", "value")
+
+    assert cache.get("key") == "value"
+    assert cache.get("missing") is None
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_cache_expired():
+    cache = TTLCache(max_size=10, ttl=60)
+
+    with patch("app.utils.cache.time.monotonic", return_value=0):
+        cache.set("key", "value")
+        cache.set("short", "value", ttl=1)
+    with patch("app.utils.cache.time.monotonic", return_value=30):
+        assert cache.get("key") == "value"
+        assert cache.get("short") is None
+    with patch("app.utils.cache.time.monotonic", return_value=60):
+        assert cache.get("key") is None
+
+    assert cache.stats() == {"size": 0, "hits": 1, "misses": 2}
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, ttl=60)
+
+    cache.set(1, "first")
+    cache.set(2, "second")
+    cache.get(1)
+    cache.set(3, "third")
+
+    assert cache.get(1) == "first"
+    assert cache.get(2) is None
+    assert cache.get(3) == "third"
+
+
+def test_cache_invalidate_and_clear():
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set(1, "first")
+    cache.set(2, "second")
+
+    cache.invalidate(1)
+    cache.invalidate(100)
+
+    assert cache.get(1) is None
+    assert cache.get(2) == "second"
+
+    cache.clear()
+
+    assert cache.stats() == {"size": 0, "hits": 0, "misses": 0}
+
+
+def test_revocation_store():
+    store = RevocationStore()
+
+    with patch("app.utils.cache.time.monotonic", return_value=0):
+        store.revoke("first", 10)
+        store.revoke("second", 30)
+        assert store.is_revoked("first") is True
+        assert store.is_revoked("missing") is False
+    with patch("app.utils.cache.time.monotonic", return_value=20):
+        assert store.is_revoked("first") is False
+        assert store.is_revoked("second") is True
+        store.revoke("third", 10)
+
+    assert set(store.entries) == {"second", "third"}
+
+
+def test_revocation_store_prunes_expired():
+    store = RevocationStore()
+
+    with patch("app.utils.cache.time.monotonic", return_value=0):
+        store.revoke("first", 10)
+        store.revoke("second", 10)
+        store.revoke("first", 50)
+    with patch("app.utils.cache.time.monotonic", return_value=20):
+        store.revoke("third", 10)
+        assert store.is_revoked("first") is True
+
+    assert set(store.entries) == {"first", "third"}
+    assert len(store.expirations) == 2
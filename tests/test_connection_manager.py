@@ -0,0 +1,453 @@
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import msgpack
+import orjson
+import pytest
+from fastapi import status
+
+from app.utils.broadcast import LocalBroadcastBackend, PostgresBroadcastBackend
+from app.utils.event_log import EventLog
+from app.utils.websocket import ConnectionManager, Encoding, EventStream, negotiate_encoding
+
+
+class FakeWebSocket:
+    def __init__(self, send_delay: float = 0):
+        self.send_delay = send_delay
+        self.sent = []
+        self.accept = AsyncMock()
+        self.close = AsyncMock()
+
+    async def send_text(self, frame):
+        await asyncio.sleep(self.send_delay)
+        self.sent.append(frame)
+
+    async def send_bytes(self, frame):
+        await asyncio.sleep(self.send_delay)
+        self.sent.append(frame)
+
+
+async def start_manager(queue_size: int, coalesce_window: float = 0) -> ConnectionManager:
+    ws_manager = ConnectionManager(queue_size, LocalBroadcastBackend(), coalesce_window)
+    await ws_manager.start()
+    return ws_manager
+
+
+@pytest.mark.asyncio
+async def test_broadcast_does_not_wait_for_clients():
+    ws_manager = await start_manager(queue_size=10)
+    slow_client, fast_client = FakeWebSocket(send_delay=10), FakeWebSocket()
+    await ws_manager.connect(slow_client)
+    await ws_manager.connect(fast_client)
+
+    await asyncio.wait_for(ws_manager.broadcast({"event": "task_created"}), timeout=0.1)
+    await asyncio.sleep(0.01)
+
+    assert [json.loads(frame) for frame in fast_client.sent] == [{"event": "task_created"}]
+    assert slow_client.sent == []
+    await ws_manager.disconnect(slow_client)
+    await ws_manager.disconnect(fast_client)
+    assert ws_manager.active_connections == {}
+
+
+@pytest.mark.asyncio
+async def test_broadcast_keeps_order():
+    ws_manager = await start_manager(queue_size=10)
+    client = FakeWebSocket()
+    await ws_manager.connect(client)
+    messages = [{"event": "task_created"}, {"event": "task_updated"}, {"event": "task_deleted"}]
+
+    for message in messages:
+        await ws_manager.broadcast(message)
+    await asyncio.sleep(0.01)
+
+    assert [json.loads(frame) for frame in client.sent] == messages
+    await ws_manager.disconnect(client)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_drops_overflowing_client():
+    ws_manager = await start_manager(queue_size=2)
+    slow_client, fast_client = FakeWebSocket(send_delay=10), FakeWebSocket()
+    await ws_manager.connect(slow_client)
+    await ws_manager.connect(fast_client)
+
+    for i in range(4):
+        await ws_manager.broadcast({"event": "task_updated", "id": i})
+        await asyncio.sleep(0.01)
+
+    assert list(ws_manager.active_connections) == [fast_client]
+    assert ws_manager.dropped_connections == 1
+    assert len(fast_client.sent) == 4
+    slow_client.close.assert_called_once_with(code=status.WS_1013_TRY_AGAIN_LATER)
+    await ws_manager.disconnect(slow_client)
+    await ws_manager.disconnect(fast_client)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_serializes_once():
+    ws_manager = await start_manager(queue_size=10)
+    clients = [FakeWebSocket() for _ in range(3)]
+    for client in clients:
+        await ws_manager.connect(client)
+    message = {"event": "task_created", "task": {"id": 1, "created_at": "2025-01-01T00:00:00"}}
+
+    with patch("app.utils.websocket.orjson.dumps", wraps=orjson.dumps) as mock_dumps:
+        await ws_manager.broadcast(message)
+    await asyncio.sleep(0.01)
+
+    mock_dumps.assert_called_once_with(message)
+    assert all(client.sent[0] is clients[0].sent[0] for client in clients)
+    assert json.loads(clients[0].sent[0]) == message
+    for client in clients:
+        await ws_manager.disconnect(client)
+
+
+async def connect_with_topics(ws_manager, **topics):
+    client = FakeWebSocket()
+    await ws_manager.connect(client)
+    if topics:
+        ws_manager.handle_message(client, json.dumps({"action": "subscribe", **topics}))
+    await asyncio.sleep(0.01)
+    client.sent.clear()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_broadcast_to_subscribers():
+    ws_manager = await start_manager(queue_size=10)
+    task_client = await connect_with_topics(ws_manager, task_ids=[1])
+    user_client = await connect_with_topics(ws_manager, user_ids=[2])
+    event_client = await connect_with_topics(ws_manager, events=["task_deleted"])
+    all_client = await connect_with_topics(ws_manager)
+    messages = [
+        {"event": "task_updated", "task": {"id": 1, "users": []}},
+        {"event": "task_assigned", "task": {"id": 3, "users": [{"id": 2}]}},
+        {"event": "tasks_unassigned", "assignments": [{"task_id": 1, "user_id": 5}]},
+        {"event": "task_deleted", "task": {"id": 4}},
+        {"event": "tasks_created", "tasks": [{"id": 5}, {"id": 6}]},
+        {"event": "task_updated", "task": {"id": 7}, "user_ids": [2, 8]},
+    ]
+
+    for message in messages:
+        await ws_manager.broadcast(message)
+    await asyncio.sleep(0.01)
+
+    assert [json.loads(frame) for frame in task_client.sent] == [messages[0], messages[2]]
+    assert [json.loads(frame) for frame in user_client.sent] == [messages[1], messages[5]]
+    assert [json.loads(frame) for frame in event_client.sent] == [messages[3]]
+    assert [json.loads(frame) for frame in all_client.sent] == messages
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe_and_disconnect():
+    ws_manager = await start_manager(queue_size=10)
+    client = await connect_with_topics(ws_manager, task_ids=[1, 2])
+
+    ws_manager.handle_message(client, json.dumps({"action": "unsubscribe", "task_ids": [1]}))
+    await asyncio.sleep(0.01)
+
+    assert json.loads(client.sent[0]) == {"event": "unsubscribed", "task_ids": [1], "user_ids": [], "events": []}
+    assert set(ws_manager.subscribers) == {("task", 2)}
+    assert client not in ws_manager.unfiltered
+
+    ws_manager.handle_message(client, json.dumps({"action": "unsubscribe", "task_ids": [2]}))
+    assert ws_manager.subscribers == {}
+    assert list(ws_manager.unfiltered)[0].websocket is client
+
+    await ws_manager.disconnect(client)
+    assert ws_manager.unfiltered == set()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "message",
+    (
+        "not json",
+        json.dumps({"action": "listen"}),
+        json.dumps({"action": "subscribe", "task_ids": ["first"]}),
+    ),
+)
+async def test_wrong_subscription(message):
+    ws_manager = await start_manager(queue_size=10)
+    client = await connect_with_topics(ws_manager)
+
+    ws_manager.handle_message(client, message)
+    await asyncio.sleep(0.01)
+
+    assert json.loads(client.sent[0]) == {"event": "error", "detail": "Wrong message"}
+    assert ws_manager.subscribers == {}
+    await ws_manager.disconnect(client)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_coalesces_task_events():
+    ws_manager = await start_manager(queue_size=10, coalesce_window=0.05)
+    task_client = await connect_with_topics(ws_manager, task_ids=[1])
+    event_client = await connect_with_topics(ws_manager, events=["task_deleted"])
+    all_client = await connect_with_topics(ws_manager)
+    messages = [
+        {"event": "task_updated", "task": {"id": 1, "status": "new"}},
+        {"event": "task_updated", "task": {"id": 2, "status": "new"}},
+        {"event": "task_updated", "task": {"id": 1, "status": "in_progress"}},
+        {"event": "task_updated", "task": {"id": 1, "status": "completed"}},
+    ]
+
+    for message in messages:
+        await ws_manager.broadcast(message)
+    await asyncio.sleep(0.01)
+    assert all_client.sent == []
+
+    await asyncio.sleep(0.1)
+
+    assert [json.loads(frame) for frame in all_client.sent] == [{"event": "batch", "events": messages[1::2]}]
+    assert [json.loads(frame) for frame in task_client.sent] == [messages[3]]
+    assert event_client.sent == []
+    assert ws_manager.coalescer.stats() == {"pending": 0, "received": 4, "coalesced": 2, "frames": 1}
+
+
+@pytest.mark.asyncio
+async def test_coalescer_keeps_distinct_events():
+    ws_manager = await start_manager(queue_size=10, coalesce_window=10)
+    client = await connect_with_topics(ws_manager)
+    messages = [
+        {"event": "task_created", "task": {"id": 1}},
+        {"event": "tasks_unassigned", "assignments": [{"task_id": 1, "user_id": 2}]},
+        {"event": "tasks_unassigned", "assignments": [{"task_id": 1, "user_id": 3}]},
+        {"event": "task_deleted", "task": {"id": 1}},
+    ]
+
+    for message in messages:
+        await ws_manager.broadcast(message)
+    await ws_manager.stop()
+    await asyncio.sleep(0.01)
+
+    assert [json.loads(frame) for frame in client.sent] == [{"event": "batch", "events": messages}]
+    assert ws_manager.coalescer.stats()["coalesced"] == 0
+
+
+@pytest.mark.asyncio
+async def test_coalescer_sends_single_event_unwrapped():
+    ws_manager = await start_manager(queue_size=10, coalesce_window=0.01)
+    client = await connect_with_topics(ws_manager)
+    message = {"event": "task_updated", "task": {"id": 1}}
+
+    await ws_manager.broadcast(message)
+    await asyncio.sleep(0.05)
+
+    assert [json.loads(frame) for frame in client.sent] == [message]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("coalesce_window", (0, 10))
+async def test_publish_events_sends_without_window(coalesce_window):
+    ws_manager = await start_manager(queue_size=10, coalesce_window=coalesce_window)
+    client = await connect_with_topics(ws_manager)
+    messages = [
+        {"event": "task_updated", "task": {"id": 1, "status": "new"}, "seq": 1},
+        {"event": "task_updated", "task": {"id": 1, "status": "completed"}, "seq": 2},
+    ]
+
+    await ws_manager.publish_events(messages)
+    await asyncio.sleep(0.01)
+
+    if coalesce_window:
+        assert [json.loads(frame) for frame in client.sent] == [messages[1]]
+        assert ws_manager.coalescer.stats() == {"pending": 0, "received": 2, "coalesced": 1, "frames": 1}
+    else:
+        assert [json.loads(frame) for frame in client.sent] == messages
+
+
+@pytest.mark.asyncio
+async def test_publish_events_respects_stream_scope():
+    ws_manager = await start_manager(queue_size=10, coalesce_window=10)
+    client = await ws_manager.open_stream(EventStream(), {("event", "task_deleted")}, scope={("task", 3)})
+    messages = [{"event": "task_deleted", "task": {"id": 1}}, {"event": "task_deleted", "task": {"id": 3}}]
+
+    await ws_manager.publish_events(messages)
+
+    seq, frame = client.queue.get_nowait()
+    assert json.loads(frame) == messages[1]
+    assert client.queue.empty()
+
+
+@pytest.fixture
+async def logged_manager(mock_uow):
+    ws_manager = ConnectionManager(10, LocalBroadcastBackend(), event_log=EventLog(lambda: mock_uow, 10, 10))
+    await ws_manager.start()
+    return ws_manager
+
+
+@pytest.mark.asyncio
+async def test_broadcast_with_sequence(logged_manager):
+    client = await connect_with_topics(logged_manager)
+
+    await logged_manager.broadcast({"event": "task_created", "seq": 1})
+    await logged_manager.broadcast({"event": "task_updated"})
+    await asyncio.sleep(0.01)
+
+    assert [json.loads(frame) for frame in client.sent] == [
+        {"event": "task_created", "seq": 1},
+        {"event": "task_updated"},
+    ]
+    assert list(logged_manager.event_log.buffer) == [{"event": "task_created", "seq": 1}]
+
+
+@pytest.mark.asyncio
+async def test_connect_replays_missed_events(logged_manager):
+    events = [{"event": "task_updated", "seq": seq} for seq in range(1, 7)]
+
+    async def get_since(last_seq):
+        for event in events[4:]:
+            logged_manager.deliver(event, json.dumps(event))
+        return events[3:5]
+
+    client = FakeWebSocket()
+    with patch.object(logged_manager.event_log, "get_since", side_effect=get_since):
+        await logged_manager.connect(client, last_seq=3)
+    await asyncio.sleep(0.01)
+
+    assert [json.loads(frame) for frame in client.sent] == [{"event": "batch", "events": events[3:5]}, events[5]]
+    assert client.sent[1] == json.dumps(events[5])
+    await logged_manager.broadcast({"status": "updated"})
+    await asyncio.sleep(0.01)
+    assert len(client.sent) == 3
+
+
+@pytest.mark.asyncio
+async def test_connect_requires_resync(logged_manager):
+    client = FakeWebSocket()
+
+    with patch.object(logged_manager.event_log, "get_since", AsyncMock(return_value=None)):
+        await logged_manager.connect(client, last_seq=0)
+    await asyncio.sleep(0.01)
+
+    assert [json.loads(frame) for frame in client.sent] == [{"event": "resync_required"}]
+
+
+@pytest.mark.asyncio
+async def test_ping_keeps_connection_alive():
+    ws_manager = await start_manager(queue_size=10)
+    first_client = await connect_with_topics(ws_manager)
+    second_client = await connect_with_topics(ws_manager)
+    third_client = await connect_with_topics(ws_manager)
+    deadline = time.monotonic()
+
+    ws_manager.handle_message(first_client, json.dumps({"action": "ping"}))
+    await asyncio.sleep(0.01)
+
+    assert [json.loads(frame) for frame in first_client.sent] == [{"event": "pong"}]
+    assert ws_manager.reap_idle(deadline) == 2
+    assert list(ws_manager.active_connections) == [first_client]
+    assert ws_manager.unfiltered == {ws_manager.active_connections[first_client]}
+    assert ws_manager.reaped_connections == 2
+    await asyncio.sleep(0.01)
+    second_client.close.assert_called_once_with(code=status.WS_1001_GOING_AWAY)
+    third_client.close.assert_called_once_with(code=status.WS_1001_GOING_AWAY)
+    first_client.close.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_reaper_closes_idle_connections():
+    ws_manager = ConnectionManager(10, LocalBroadcastBackend(), idle_timeout=0.05)
+    await ws_manager.start()
+    idle_client = await connect_with_topics(ws_manager, task_ids=[1])
+    active_client = await connect_with_topics(ws_manager)
+
+    for _ in range(6):
+        ws_manager.handle_message(active_client, json.dumps({"action": "ping"}))
+        await asyncio.sleep(0.02)
+    await ws_manager.stop()
+
+    assert list(ws_manager.active_connections) == [active_client]
+    assert ws_manager.subscribers == {}
+    idle_client.close.assert_called_once_with(code=status.WS_1001_GOING_AWAY)
+    assert ws_manager.reaper is None
+
+
+@pytest.mark.asyncio
+async def test_broadcast_encodes_once_per_encoding():
+    ws_manager = await start_manager(queue_size=10)
+    json_client = FakeWebSocket()
+    msgpack_clients = [FakeWebSocket() for _ in range(3)]
+    await ws_manager.connect(json_client)
+    for client in msgpack_clients:
+        await ws_manager.connect(client, encoding=Encoding.MSGPACK, subprotocol="msgpack")
+    message = {"event": "task_updated", "task": {"id": 1, "users": [{"id": 2}]}}
+
+    with patch("app.utils.websocket.msgpack.packb", wraps=msgpack.packb) as mock_packb:
+        await ws_manager.broadcast(message)
+    await asyncio.sleep(0.01)
+
+    mock_packb.assert_called_once_with(message)
+    assert json.loads(json_client.sent[0]) == message
+    assert all(client.sent[0] is msgpack_clients[0].sent[0] for client in msgpack_clients)
+    assert msgpack.unpackb(msgpack_clients[0].sent[0]) == message
+    msgpack_clients[0].accept.assert_called_once_with(subprotocol="msgpack")
+
+
+@pytest.mark.asyncio
+async def test_coalesced_batch_with_msgpack():
+    ws_manager = await start_manager(queue_size=10, coalesce_window=0.01)
+    json_client = await connect_with_topics(ws_manager)
+    msgpack_client = FakeWebSocket()
+    await ws_manager.connect(msgpack_client, encoding=Encoding.MSGPACK)
+    ws_manager.handle_message(msgpack_client, json.dumps({"action": "subscribe", "task_ids": [2]}))
+    messages = [{"event": "task_updated", "task": {"id": task_id}} for task_id in (1, 2)]
+
+    for message in messages:
+        await ws_manager.broadcast(message)
+    await asyncio.sleep(0.05)
+
+    assert json.loads(json_client.sent[0]) == {"event": "batch", "events": messages}
+    assert [msgpack.unpackb(frame) for frame in msgpack_client.sent] == [
+        {"event": "subscribed", "task_ids": [2], "user_ids": [], "events": []},
+        messages[1],
+    ]
+
+
+@pytest.mark.parametrize(
+    "subprotocols, encoding, expected",
+    (
+        [[], None, (Encoding.JSON, None)],
+        [[], Encoding.MSGPACK, (Encoding.MSGPACK, None)],
+        [["msgpack"], None, (Encoding.MSGPACK, "msgpack")],
+        [["json", "msgpack"], Encoding.JSON, (Encoding.MSGPACK, "msgpack")],
+    ),
+)
+def test_negotiate_encoding(subprotocols, encoding, expected):
+    websocket = MagicMock(scope={"subprotocols": subprotocols})
+
+    assert negotiate_encoding(websocket, encoding) == expected
+
+
+@pytest.mark.asyncio
+async def test_broadcast_not_started():
+    ws_manager = ConnectionManager(10, LocalBroadcastBackend())
+    client = FakeWebSocket()
+    await ws_manager.connect(client)
+
+    await ws_manager.broadcast({"event": "task_created"})
+    await asyncio.sleep(0.01)
+
+    assert client.sent == []
+    await ws_manager.disconnect(client)
+
+
+@pytest.mark.parametrize("size", [10, 7000, 20000])
+def test_postgres_backend_chunks(size):
+    backend = PostgresBroadcastBackend("postgresql://test", "task_events")
+    backend.handler = MagicMock()
+    message = {"event": "task_created", "task": {"id": 1, "description": "ё" * size}}
+    frame = orjson.dumps(message).decode()
+
+    chunks = backend.split(frame.encode())
+    for index, chunk in reversed(list(enumerate(chunks))):
+        backend.on_notification(None, 1, "task_events", f"message {index} {len(chunks)} {chunk}")
+
+    assert all(len(chunk.encode()) <= backend.payload_limit for chunk in chunks)
+    assert "".join(chunks) == frame
+    backend.handler.assert_called_once_with(message, frame)
+    assert backend.parts == {}
@@ -0,0 +1,80 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.utils.event_log import EventLog
+
+
+@pytest.fixture
+def event_log(mock_uow):
+    return EventLog(lambda: mock_uow, buffer_size=3, replay_limit=5)
+
+
+@pytest.mark.asyncio
+async def test_event_log_replay_from_buffer(event_log, mock_uow):
+    for seq in (3, 5, 4, 6):
+        event_log.record({"event": "task_updated", "seq": seq})
+    event_log.record({"event": "task_updated"})
+
+    events = await event_log.get_since(3)
+
+    assert [event["seq"] for event in events] == [4, 5, 6]
+    mock_uow.uow.task_event_repo.find_since.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_event_log_replay_from_db(event_log, mock_uow):
+    event_log.record({"event": "task_updated", "seq": 10})
+    mock_uow.uow.task_event_repo.find_since.return_value = [
+        MagicMock(seq=seq, payload={"event": "task_updated"}) for seq in (2, 3)
+    ]
+
+    events = await event_log.get_since(1)
+
+    assert events == [{"event": "task_updated", "seq": 2}, {"event": "task_updated", "seq": 3}]
+    mock_uow.uow.task_event_repo.find_since.assert_called_once_with(1, 6)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("rows, error", ([[MagicMock(seq=seq, payload={}) for seq in range(6)], None], [[], OSError()]))
+async def test_event_log_replay_too_far(event_log, mock_uow, rows, error):
+    mock_uow.uow.task_event_repo.find_since.return_value = rows
+    mock_uow.uow.task_event_repo.find_since.side_effect = error
+
+    assert await event_log.get_since(0) is None
+
+
+@pytest.mark.asyncio
+async def test_task_event_repo(test_uow):
+    messages = [{"event": "task_created", "task": {"id": 1}}, {"event": "task_deleted", "task": {"id": 1}}]
+    async with test_uow as uow:
+        for message in messages:
+            await uow.task_event_repo.add_one({"event": message["event"], "payload": message})
+        await uow.commit()
+    event_log = EventLog(lambda: test_uow, buffer_size=10, replay_limit=10)
+
+    assert await event_log.get_since(0) == []
+
+    async with test_uow as uow:
+        await uow.task_event_repo.lock_dispatch()
+        assert await uow.task_event_repo.assign_seqs(limit=1) == 1
+        await uow.commit()
+
+    async with test_uow as uow:
+        events = await uow.task_event_repo.find_unpublished(limit=10)
+        assert [event.id for event in events] == [1]
+    seq = events[0].seq
+    assert await event_log.get_since(0) == []
+
+    async with test_uow as uow:
+        assert [event.seq for event in await uow.task_event_repo.find_unpublished(limit=10)] == [seq]
+        await uow.task_event_repo.mark_published([1])
+        await uow.commit()
+
+    assert await event_log.get_since(0) == [{**messages[0], "seq": seq}]
+    assert await event_log.get_since(seq) == []
+
+    async with test_uow as uow:
+        assert await uow.task_event_repo.assign_seqs(limit=10) == 1
+        events = await uow.task_event_repo.find_unpublished(limit=10)
+        assert [(event.id, event.seq) for event in events] == [(2, seq + 1)]
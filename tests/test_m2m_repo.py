@@ -1,6 +1,11 @@
 import pytest
+from sqlalchemy import inspect
 from sqlalchemy.exc import IntegrityError
 
+from app.api.schemas.user import UserPrincipal
+from app.repositories.base_repository import LoadStrategy
+from app.utils.rbac import assigned_tasks_policy
+
 
 async def create_task_and_user(uow, task_data, user_data):
     async with uow as u:
@@ -161,3 +166,128 @@ async def test_repos_task_delete_user_not_assigned(test_uow, task_data, user_dat
 
     assert exc_info.type is exc_type
     assert "not in" in exc_info.value.args[0]
+
+
+@pytest.mark.asyncio
+async def test_repos_task_add_assignments(test_uow, task_data, user_data):
+    await create_task_and_user(test_uow, task_data, user_data)
+    await add_user_to_task(test_uow)
+
+    async with test_uow as uow:
+        await uow.task_repo.add_one({**task_data, "title": "task2"})
+        applied = await uow.task_repo.add_assignments([(1, 1), (2, 1), (3, 1), (2, 2)])
+        await uow.commit()
+
+    async with test_uow as uow:
+        user = await uow.user_repo.find_one(id=1)
+
+        assert applied == [(2, 1)]
+        assert sorted(task.id for task in user.tasks) == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_repos_task_remove_assignments(test_uow, task_data, user_data):
+    await create_task_and_user(test_uow, task_data, user_data)
+    await add_user_to_task(test_uow)
+
+    async with test_uow as uow:
+        removed = await uow.task_repo.remove_assignments([(1, 1), (2, 1)])
+        await uow.commit()
+
+    async with test_uow as uow:
+        user = await uow.user_repo.find_one(id=1)
+
+        assert removed == [(1, 1)]
+        assert user.tasks == []
+
+
+@pytest.mark.asyncio
+async def test_repos_remove_assigned_user(test_uow, task_data, user_data):
+    await create_task_and_user(test_uow, task_data, user_data)
+    await add_user_to_task(test_uow)
+
+    async with test_uow as uow:
+        await uow.user_repo.remove_one(1)
+        await uow.commit()
+
+    async with test_uow as uow:
+        task = await uow.task_repo.find_one(id=1)
+
+        assert task.users == []
+
+
+@pytest.mark.asyncio
+async def test_repos_remove_assigned_task(test_uow, task_data, user_data):
+    await create_task_and_user(test_uow, task_data, user_data)
+    await add_user_to_task(test_uow)
+
+    async with test_uow as uow:
+        await uow.task_repo.remove_one(1)
+        await uow.commit()
+
+    async with test_uow as uow:
+        user = await uow.user_repo.find_one(id=1)
+
+        assert user.tasks == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("load", (LoadStrategy.SELECTIN, LoadStrategy.JOINED))
+async def test_repos_find_one_load_relationship(test_uow, task_data, user_data, load):
+    await create_task_and_user(test_uow, task_data, user_data)
+    await add_user_to_task(test_uow)
+
+    async with test_uow as uow:
+        task = await uow.task_repo.find_one(load=load, id=1)
+        user = await uow.user_repo.find_one(load=load, id=1)
+
+        assert [found_user.id for found_user in task.users] == [1]
+        assert [found_task.id for found_task in user.tasks] == [1]
+
+
+@pytest.mark.asyncio
+async def test_repos_find_one_load_count(test_uow, task_data, user_data):
+    await create_task_and_user(test_uow, task_data, user_data)
+    await add_user_to_task(test_uow)
+
+    async with test_uow as uow:
+        task = await uow.task_repo.find_one(load=LoadStrategy.COUNT, id=1)
+        user = await uow.user_repo.find_one(load=LoadStrategy.COUNT, id=1)
+
+        assert task.users_count == 1
+        assert user.tasks_count == 1
+        assert "users" not in inspect(task).dict
+        assert "tasks" not in inspect(user).dict
+
+
+@pytest.mark.asyncio
+async def test_repos_find_one_load_none(test_uow, task_data, user_data):
+    await create_task_and_user(test_uow, task_data, user_data)
+    await add_user_to_task(test_uow)
+
+    async with test_uow as uow:
+        user = await uow.user_repo.find_one(load=LoadStrategy.NONE, id=1)
+
+        assert user.id == 1
+        assert "tasks" not in inspect(user).dict
+
+
+@pytest.mark.asyncio
+async def test_repos_task_get_assignee_ids(test_uow, task_data, user_data):
+    await create_task_and_user(test_uow, task_data, user_data)
+    await add_user_to_task(test_uow)
+
+    async with test_uow as uow:
+        assert await uow.task_repo.get_assignee_ids(1) == [1]
+        assert await uow.task_repo.get_assignee_ids(2) == []
+
+
+@pytest.mark.asyncio
+async def test_repos_task_find_ids(test_uow, task_data, user_data):
+    await create_task_and_user(test_uow, task_data, user_data)
+    await add_user_to_task(test_uow)
+
+    async with test_uow as uow:
+        assert await uow.task_repo.find_ids() == [1]
+        assert await uow.task_repo.find_ids(assigned_tasks_policy.conditions(UserPrincipal(id=1, roles=["user"]))) == [1]
+        assert await uow.task_repo.find_ids(assigned_tasks_policy.conditions(UserPrincipal(id=2, roles=["user"]))) == []
@@ -0,0 +1,110 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.utils.outbox import OutboxDispatcher
+
+
+@pytest.fixture
+def ws_manager():
+    ws_manager = AsyncMock()
+    ws_manager.publish_events = AsyncMock()
+    return ws_manager
+
+
+@pytest.fixture
+def outbox(mock_uow, ws_manager):
+    return OutboxDispatcher(lambda: mock_uow, ws_manager, batch_size=2, interval=10)
+
+
+def get_seqs(ws_manager):
+    return [message["seq"] for call in ws_manager.publish_events.call_args_list for message in call.args[0]]
+
+
+def get_events(*ids):
+    return [
+        MagicMock(id=event_id, seq=event_id + 10, payload={"event": "task_updated", "task": {"id": 1}})
+        for event_id in ids
+    ]
+
+
+@pytest.mark.asyncio
+async def test_outbox_dispatch(outbox, ws_manager, mock_uow, mock_task_event_repo):
+    mock_task_event_repo.find_unpublished.return_value = get_events(3, 4)
+
+    assert await outbox.dispatch() == 2
+
+    assert mock_task_event_repo.lock_dispatch.call_count == 2
+    mock_task_event_repo.assign_seqs.assert_called_once_with(2)
+    mock_task_event_repo.find_unpublished.assert_called_once_with(2)
+    assert get_seqs(ws_manager) == [13, 14]
+    mock_task_event_repo.mark_published.assert_called_once_with([3, 4])
+    assert mock_uow.uow.commit.call_count == 2
+    assert outbox.published_events == 2
+
+
+@pytest.mark.asyncio
+async def test_outbox_dispatch_publish_failed(outbox, ws_manager, mock_uow, mock_task_event_repo):
+    mock_task_event_repo.find_unpublished.return_value = get_events(3)
+    ws_manager.publish_events.side_effect = OSError()
+
+    with pytest.raises(OSError):
+        await outbox.dispatch()
+
+    mock_task_event_repo.assign_seqs.assert_called_once_with(2)
+    mock_task_event_repo.mark_published.assert_not_called()
+    mock_uow.uow.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_outbox_dispatch_nothing(outbox, ws_manager, mock_uow, mock_task_event_repo):
+    mock_task_event_repo.find_unpublished.return_value = []
+
+    assert await outbox.dispatch() == 0
+
+    ws_manager.publish_events.assert_not_called()
+    mock_task_event_repo.mark_published.assert_not_called()
+    mock_uow.uow.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_outbox_run_drains_and_waits(outbox, ws_manager, mock_task_event_repo):
+    mock_task_event_repo.find_unpublished.side_effect = [
+        get_events(1, 2),
+        get_events(3),
+        OperationalError("select", {}, OSError()),
+        get_events(4),
+    ]
+
+    await outbox.start()
+    await asyncio.sleep(0.01)
+    assert get_seqs(ws_manager) == [11, 12, 13]
+
+    outbox.notify()
+    await asyncio.sleep(0.01)
+    outbox.notify()
+    await asyncio.sleep(0.01)
+    await outbox.stop()
+
+    assert get_seqs(ws_manager) == [11, 12, 13, 14]
+    assert outbox.runner is None
+
+
+@pytest.mark.asyncio
+async def test_outbox_run_survives_publish_error(outbox, ws_manager, mock_task_event_repo):
+    mock_task_event_repo.find_unpublished.side_effect = [get_events(1), get_events(1)]
+    ws_manager.publish_events.side_effect = [Exception("notify queue is full"), None]
+
+    await outbox.start()
+    await asyncio.sleep(0.01)
+    mock_task_event_repo.mark_published.assert_not_called()
+
+    outbox.notify()
+    await asyncio.sleep(0.01)
+    await outbox.stop()
+
+    assert get_seqs(ws_manager) == [11, 11]
+    mock_task_event_repo.mark_published.assert_called_once_with([1])
+    assert outbox.published_events == 1
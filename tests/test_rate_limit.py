@@ -0,0 +1,73 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException, status
+
+from app.utils.rate_limit import GCRALimiter, LoginAdmission
+
+
+def test_gcra_limiter_burst():
+    limiter = GCRALimiter(rate_per_minute=60, burst=3, max_keys=10)
+
+    with patch("app.utils.rate_limit.time.monotonic", return_value=100):
+        assert [limiter.hit("key") for _ in range(3)] == [0, 0, 0]
+        assert limiter.hit("key") == pytest.approx(1)
+        assert limiter.hit("other") == 0
+    with patch("app.utils.rate_limit.time.monotonic", return_value=101):
+        assert limiter.hit("key") == 0
+        assert limiter.hit("key") == pytest.approx(1)
+
+
+def test_gcra_limiter_bounded():
+    limiter = GCRALimiter(rate_per_minute=60, burst=1, max_keys=2)
+
+    for key in range(5):
+        limiter.hit(key)
+
+    assert list(limiter.arrivals) == [3, 4]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "username, client_ip",
+    (
+        ["user1", "127.0.0.2"],
+        ["user2", "127.0.0.1"],
+    ),
+)
+async def test_login_admission_rate_limited(username, client_ip):
+    admission = LoginAdmission(GCRALimiter(60, 1, 10), GCRALimiter(60, 1, 10), max_concurrent=10)
+    async with admission.admit("user1", "127.0.0.1"):
+        pass
+
+    with pytest.raises(HTTPException) as exc_info:
+        async with admission.admit(username, client_ip):
+            pass
+
+    assert exc_info.value.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert admission.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_login_admission_concurrency():
+    admission = LoginAdmission(GCRALimiter(600, 10, 10), GCRALimiter(600, 10, 10), max_concurrent=1)
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_login():
+        async with admission.admit("user1", "127.0.0.1"):
+            started.set()
+            await release.wait()
+
+    task = asyncio.create_task(slow_login())
+    await started.wait()
+
+    with pytest.raises(HTTPException) as exc_info:
+        async with admission.admit("user2", "127.0.0.2"):
+            pass
+
+    release.set()
+    await task
+    assert exc_info.value.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert admission.in_flight == 0
@@ -0,0 +1,106 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import jwt
+import pytest
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.security import PasswordHasher, create_access_token, create_refresh_token, decode_token
+from app.utils.cache import RevocationStore, TTLCache
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("workers", [0, 1])
+async def test_password_hasher(workers):
+    hasher = PasswordHasher(workers=workers, concurrency=2, queue_timeout=5)
+
+    hashed_password = await hasher.hash("password")
+
+    assert hashed_password != "password"
+    assert await hasher.verify("password", hashed_password) is True
+    assert await hasher.verify("wrong", hashed_password) is False
+    hasher.shutdown()
+    assert hasher.executor is None
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_queue_timeout():
+    hasher = PasswordHasher(workers=0, concurrency=1, queue_timeout=0.05)
+
+    results = await asyncio.gather(hasher.run(time.sleep, 0.3), hasher.run(time.sleep, 0), return_exceptions=True)
+
+    assert results[0] is None
+    assert isinstance(results[1], HTTPException)
+    assert results[1].status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert results[1].detail == "Server is busy"
+
+
+@pytest.mark.asyncio
+async def test_decode_token_cached():
+    token = create_access_token({"sub": "1"})
+    token_cache = TTLCache(max_size=10, ttl=60)
+
+    with patch("app.core.security.jwt.decode", wraps=jwt.decode) as mock_decode:
+        first = await decode_token(token, token_cache, RevocationStore())
+        second = await decode_token(token, token_cache, RevocationStore())
+
+    assert first == second
+    assert first["sub"] == "1"
+    mock_decode.assert_called_once()
+    assert token_cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+@pytest.mark.asyncio
+async def test_decode_token_cache_expires_with_token(monkeypatch):
+    monkeypatch.setattr(settings, "JWT_ACCESS_EXPIRE_SECONDS", 1)
+    token = create_access_token({"sub": "1"})
+    token_cache = TTLCache(max_size=10, ttl=60)
+    await decode_token(token, token_cache, RevocationStore())
+
+    await asyncio.sleep(1)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await decode_token(token, token_cache, RevocationStore())
+
+    assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+    assert exc_info.value.detail == "Token expired"
+
+
+@pytest.mark.asyncio
+async def test_decode_token_invalid_not_cached():
+    token_cache = TTLCache(max_size=10, ttl=60)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await decode_token("invalid", token_cache, RevocationStore())
+
+    assert exc_info.value.detail == "Invalid token"
+    assert token_cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_decode_token_rejects_refresh_token():
+    token = create_refresh_token({"sub": "1", "sid": "session", "jti": "token"})
+
+    with pytest.raises(HTTPException) as exc_info:
+        await decode_token(token, TTLCache(max_size=10, ttl=60), RevocationStore())
+
+    assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+    assert exc_info.value.detail == "Invalid token"
+
+
+@pytest.mark.asyncio
+async def test_decode_token_revoked_session():
+    token = create_access_token({"sub": "1", "sid": "session"})
+    token_cache = TTLCache(max_size=10, ttl=60)
+    revoked_sessions = RevocationStore()
+    await decode_token(token, token_cache, revoked_sessions)
+
+    revoked_sessions.revoke("session", 60)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await decode_token(token, token_cache, revoked_sessions)
+
+    assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+    assert exc_info.value.detail == "Token revoked"
@@ -0,0 +1,118 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import orjson
+import pytest
+
+from app.utils.broadcast import LocalBroadcastBackend
+from app.utils.event_log import EventLog
+from app.utils.sse import stream_events
+from app.utils.websocket import ConnectionManager
+
+
+@pytest.fixture
+async def ws_manager(mock_uow):
+    ws_manager = ConnectionManager(2, LocalBroadcastBackend(), event_log=EventLog(lambda: mock_uow, 10, 10))
+    await ws_manager.start()
+    return ws_manager
+
+
+@pytest.mark.asyncio
+async def test_stream_events(ws_manager):
+    events = stream_events(ws_manager, {("task", 1)}, None, keep_alive=10)
+
+    assert await anext(events) == ": connected\n\n"
+    await ws_manager.broadcast({"event": "task_updated", "task": {"id": 2}})
+    await ws_manager.broadcast({"event": "task_updated", "task": {"id": 1}, "seq": 3})
+    await ws_manager.broadcast({"event": "task_deleted", "task": {"id": 1}})
+
+    first, second = await anext(events), await anext(events)
+    assert first == f"id: 3\ndata: {orjson.dumps({'event': 'task_updated', 'task': {'id': 1}, 'seq': 3}).decode()}\n\n"
+    assert second.startswith("data: ")
+    assert json.loads(second.removeprefix("data: ")) == {"event": "task_deleted", "task": {"id": 1}}
+
+    await events.aclose()
+    assert ws_manager.active_connections == {}
+    assert ws_manager.subscribers == {}
+
+
+@pytest.mark.asyncio
+async def test_stream_events_keep_alive(ws_manager):
+    events = stream_events(ws_manager, set(), None, keep_alive=0.01)
+
+    await anext(events)
+    assert await anext(events) == ": keep-alive\n\n"
+    await events.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stream_events_resume(ws_manager):
+    missed = [
+        {"event": "task_updated", "task": {"id": 1}, "seq": 5},
+        {"event": "task_updated", "task": {"id": 2}, "seq": 6},
+    ]
+
+    with patch.object(ws_manager.event_log, "get_since", AsyncMock(return_value=missed)) as mock_get_since:
+        events = stream_events(ws_manager, {("task", 2)}, 4, keep_alive=10)
+        await anext(events)
+        replayed = await anext(events)
+
+    mock_get_since.assert_called_once_with(4)
+    assert replayed == f"id: 6\ndata: {orjson.dumps(missed[1]).decode()}\n\n"
+    await events.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stream_events_dropped(ws_manager):
+    events = stream_events(ws_manager, set(), None, keep_alive=0.01)
+    await anext(events)
+
+    for i in range(3):
+        await ws_manager.broadcast({"event": "task_updated", "id": i})
+    await asyncio.sleep(0.01)
+
+    assert ws_manager.dropped_connections == 1
+    with pytest.raises(StopAsyncIteration):
+        await asyncio.wait_for(anext(events), 1)
+
+
+@pytest.mark.asyncio
+async def test_stream_events_busy_not_reaped():
+    ws_manager = ConnectionManager(10, LocalBroadcastBackend(), idle_timeout=0.4)
+    await ws_manager.start()
+    events = stream_events(ws_manager, set(), None, keep_alive=10)
+    await anext(events)
+
+    received = []
+    for i in range(12):
+        await ws_manager.broadcast({"event": "task_updated", "id": i})
+        received.append(await asyncio.wait_for(anext(events), 1))
+        await asyncio.sleep(0.1)
+
+    assert len(received) == 12
+    assert ws_manager.reaped_connections == 0
+    await events.aclose()
+    await ws_manager.stop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("topics", ({("event", "task_deleted")}, set()))
+async def test_stream_events_scope(ws_manager, topics):
+    messages = [
+        {"event": "task_deleted", "task": {"id": 1}},
+        {"event": "task_updated", "task": {"id": 3}},
+        {"event": "task_deleted", "task": {"id": 3}},
+    ]
+    events = stream_events(ws_manager, topics, None, keep_alive=10, scope={("user", 2), ("task", 3)})
+    await anext(events)
+
+    for message in messages:
+        await ws_manager.broadcast(message)
+    received = [json.loads((await anext(events)).removeprefix("data: "))]
+    if not topics:
+        received.append(json.loads((await anext(events)).removeprefix("data: ")))
+
+    assert received == (messages[2:] if topics else messages[1:])
+    assert ws_manager.active_connections[next(iter(ws_manager.active_connections))].queue.empty()
+    await events.aclose()
@@ -1,26 +1,131 @@
 import datetime
+from unittest.mock import MagicMock, patch
 
 import pytest
 from fastapi import status as http_status
 from fastapi.exceptions import ResponseValidationError
 
-from app.api.schemas.task import TaskCreate
+from app.api.schemas.task import TaskAssign, TaskAssignResult, TaskCreate, TaskFromDB, TaskQuery
+from app.api.schemas.websocket import EventFilter
+from app.core.config import settings
 
 
 @pytest.mark.asyncio
-async def test_get_tasks(async_mock_client, task_from_db, mock_task_service):
-    mock_task_service.get_tasks.return_value = [task_from_db]
+async def test_get_tasks(async_mock_client, task_from_db, mock_task_service, user_with_password):
+    mock_task_service.get_tasks.return_value = {"items": [task_from_db], "next_cursor": "cursor"}
 
-    response = await async_mock_client.get("/tasks/")
+    response = await async_mock_client.get("/tasks/", params={"limit": 1})
 
     response_data = response.json()
-    task = response_data[0]
+    task = response_data["items"][0]
     task["created_at"] = datetime.datetime.fromisoformat(task["created_at"])
 
     assert response.status_code == http_status.HTTP_200_OK
-    assert isinstance(response_data, list)
+    assert isinstance(response_data["items"], list)
+    assert response_data["next_cursor"] == "cursor"
     assert task == task_from_db.model_dump()
-    mock_task_service.get_tasks.assert_called_once()
+    mock_task_service.get_tasks.assert_called_once_with(user_with_password, **TaskQuery(limit=1).model_dump())
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_filtered(async_mock_client, mock_task_service, user_with_password):
+    params = {
+        "status": ["created", "completed"],
+        "created_from": "2025-01-01T00:00:00",
+        "completed_to": "2025-02-01T00:00:00",
+        "order_by": "-created_at",
+        "cursor": "cursor",
+    }
+
+    response = await async_mock_client.get("/tasks/", params=params)
+
+    assert response.status_code == http_status.HTTP_200_OK
+    mock_task_service.get_tasks.assert_called_once_with(user_with_password, **TaskQuery(**params).model_dump())
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "created_from, expected",
+    (
+        ["2025-01-01T00:00:00Z", datetime.datetime(2025, 1, 1)],
+        ["2025-01-01T03:00:00+03:00", datetime.datetime(2025, 1, 1)],
+        ["2025-01-01T00:00:00", datetime.datetime(2025, 1, 1)],
+    ),
+)
+async def test_get_tasks_aware_datetime(async_mock_client, mock_task_service, created_from, expected):
+    response = await async_mock_client.get("/tasks/", params={"created_from": created_from})
+
+    assert response.status_code == http_status.HTTP_200_OK
+    value = mock_task_service.get_tasks.call_args.kwargs["created_from"]
+    assert value == expected
+    assert value.tzinfo is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "params",
+    (
+        {"limit": 0},
+        {"limit": -1},
+        {"limit": 100000},
+        {"order_by": "title"},
+        {"created_from": "yesterday"},
+    ),
+)
+async def test_get_tasks_wrong_params(async_mock_client, mock_task_service, params):
+    response = await async_mock_client.get("/tasks/", params=params)
+
+    assert response.status_code == http_status.HTTP_422_UNPROCESSABLE_ENTITY
+    mock_task_service.get_tasks.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_export_tasks(async_mock_client, task_from_db, mock_task_service):
+    async def export_tasks(chunk_size):
+        yield f"{task_from_db.model_dump_json()}\n"
+
+    mock_task_service.export_tasks = MagicMock(side_effect=export_tasks)
+
+    response = await async_mock_client.get("/tasks/export/")
+
+    lines = response.text.splitlines()
+    assert response.status_code == http_status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [TaskFromDB.model_validate_json(line) for line in lines] == [task_from_db]
+    mock_task_service.export_tasks.assert_called_once_with(settings.EXPORT_CHUNK_SIZE)
+
+
+@pytest.mark.asyncio
+async def test_get_task_events(async_mock_client, mock_task_service):
+    mock_task_service.get_event_topics.return_value = ({("task", 1)}, {("user", 1), ("task", 1)})
+
+    async def stream_events(ws_manager, topics, last_seq, keep_alive, scope):
+        yield "id: 5\ndata: {}\n\n"
+
+    with patch("app.api.endpoints.tasks.stream_events", side_effect=stream_events) as mock_stream_events:
+        response = await async_mock_client.get(
+            "/tasks/events/", params={"task_ids": [1, 2], "events": "task_updated"}, headers={"Last-Event-ID": "4"}
+        )
+
+    assert response.status_code == http_status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.text == "id: 5\ndata: {}\n\n"
+    _, topics, last_seq, keep_alive, scope = mock_stream_events.call_args.args
+    assert topics == {("task", 1)}
+    assert scope == {("user", 1), ("task", 1)}
+    principal, event_filter = mock_task_service.get_event_topics.call_args.args
+    assert "admin" in principal.roles
+    assert event_filter == EventFilter(task_ids=[1, 2], events=["task_updated"])
+    assert last_seq == 4
+    assert keep_alive == settings.SSE_KEEP_ALIVE_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_get_task_events_wrong_id(async_mock_client):
+    response = await async_mock_client.get("/tasks/events/", headers={"Last-Event-ID": "first"})
+
+    assert response.status_code == http_status.HTTP_422_UNPROCESSABLE_ENTITY
 
 
 @pytest.mark.asyncio
@@ -136,6 +241,37 @@ async def test_create_task_wrong_input(async_mock_client, mock_task_service, tit
     mock_task_service.create_task.assert_not_called()
 
 
+@pytest.mark.asyncio
+async def test_create_tasks(async_mock_client, task_data, task_from_db, mock_task_service):
+    mock_task_service.create_tasks.return_value = [task_from_db, task_from_db]
+
+    response = await async_mock_client.post("/tasks/bulk/", json=[task_data, task_data])
+
+    response_data = response.json()
+
+    assert response.status_code == http_status.HTTP_200_OK
+    assert [TaskFromDB(**task) for task in response_data] == [task_from_db, task_from_db]
+    mock_task_service.create_tasks.assert_called_once_with([TaskCreate(**task_data), TaskCreate(**task_data)])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("tasks_count", (0, settings.BULK_MAX_SIZE + 1))
+async def test_create_tasks_wrong_size(async_mock_client, task_data, mock_task_service, tasks_count):
+    response = await async_mock_client.post("/tasks/bulk/", json=[task_data] * tasks_count)
+
+    assert response.status_code == http_status.HTTP_422_UNPROCESSABLE_ENTITY
+    mock_task_service.create_tasks.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_create_tasks_wrong_input(async_mock_client, task_data, mock_task_service):
+    response = await async_mock_client.post("/tasks/bulk/", json=[task_data, {"title": "task2"}])
+
+    assert response.status_code == http_status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"][0]["loc"] == ["body", 1, "description"]
+    mock_task_service.create_tasks.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_update_task(async_mock_client, task_data, task_from_db, mock_task_service):
     task_id = task_from_db.id
@@ -215,3 +351,30 @@ async def test_unassign_task(async_mock_client, task_from_db, mock_task_service)
     assert response.status_code == http_status.HTTP_200_OK
     assert response_data == task_from_db.model_dump()
     mock_task_service.unassign_task.assert_called_once_with(**assign_data)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "uri, method", (["/tasks/assign/bulk/", "assign_tasks"], ["/tasks/unassign/bulk/", "unassign_tasks"])
+)
+async def test_bulk_assign_tasks(async_mock_client, mock_task_service, uri, method):
+    assign_data = [{"task_id": 1, "user_id": 1}, {"task_id": 2, "user_id": 1}]
+    result = TaskAssignResult(applied=[TaskAssign(**assign_data[0])], skipped=[TaskAssign(**assign_data[1])])
+    getattr(mock_task_service, method).return_value = result
+
+    response = await async_mock_client.post(uri, json=assign_data)
+
+    assert response.status_code == http_status.HTTP_200_OK
+    assert response.json() == result.model_dump()
+    getattr(mock_task_service, method).assert_called_once_with([TaskAssign(**data) for data in assign_data])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("uri", ("/tasks/assign/bulk/", "/tasks/unassign/bulk/"))
+@pytest.mark.parametrize("assign_data", ([], [{"task_id": 1}], [{"task_id": "one", "user_id": 1}]))
+async def test_bulk_assign_tasks_wrong_input(async_mock_client, mock_task_service, uri, assign_data):
+    response = await async_mock_client.post(uri, json=assign_data)
+
+    assert response.status_code == http_status.HTTP_422_UNPROCESSABLE_ENTITY
+    mock_task_service.assign_tasks.assert_not_called()
+    mock_task_service.unassign_tasks.assert_not_called()
@@ -70,6 +70,8 @@ async def test_task_repo_add_one_wrong_data(test_uow, id, title, description, st
 
 @pytest.mark.asyncio
 async def test_task_repo_already_exists(test_uow, task_data):
+    task_data["id"] = 1
+
     async with test_uow as uow:
         await uow.task_repo.add_one(task_data)
         await uow.commit()
@@ -82,6 +84,31 @@ async def test_task_repo_already_exists(test_uow, task_data):
     assert exc_info.value.detail == "Already exists"
 
 
+@pytest.mark.asyncio
+async def test_task_repo_add_many(test_uow, task_data):
+    tasks_data = [{**task_data, "title": f"task{i}"} for i in range(3)]
+
+    async with test_uow as uow:
+        tasks = await uow.task_repo.add_many(tasks_data)
+        await uow.commit()
+
+    assert [task.id for task in tasks] == [1, 2, 3]
+    assert [task.title for task in tasks] == ["task0", "task1", "task2"]
+    assert all(task.created_at is not None for task in tasks)
+
+
+@pytest.mark.asyncio
+async def test_task_repo_add_many_wrong_data(test_uow, task_data):
+    async with test_uow as uow:
+        with pytest.raises(IntegrityError):
+            await uow.task_repo.add_many([task_data, {"title": "task2"}])
+
+    async with test_uow as uow:
+        tasks = await uow.task_repo.find_all()
+
+    assert tasks == []
+
+
 @pytest.mark.asyncio
 async def test_task_repo_find_all(test_uow, task_data):
     async with test_uow as uow:
@@ -95,6 +122,100 @@ async def test_task_repo_find_all(test_uow, task_data):
         assert all(getattr(tasks[0], field) == value for field, value in task_data.items())
 
 
+@pytest.mark.asyncio
+async def test_task_repo_find_page(test_uow, task_data):
+    async with test_uow as uow:
+        for i in range(5):
+            await uow.task_repo.add_one({**task_data, "title": f"task{i}"})
+        await uow.commit()
+
+    async with test_uow as uow:
+        first_page, cursor = await uow.task_repo.find_page(2)
+        second_page, cursor = await uow.task_repo.find_page(2, cursor)
+        last_page, last_cursor = await uow.task_repo.find_page(2, cursor)
+
+        assert [task.id for task in first_page] == [1, 2]
+        assert [task.id for task in second_page] == [3, 4]
+        assert [task.id for task in last_page] == [5]
+        assert last_cursor is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "filters, expected_ids",
+    (
+        [{}, [1, 2, 3, 4]],
+        [{"order_by": "-id"}, [4, 3, 2, 1]],
+        [{"order_by": "-created_at"}, [4, 3, 2, 1]],
+        [{"status": ["completed"]}, [2, 4]],
+        [{"status": ["created", "completed"], "order_by": "-created_at"}, [4, 3, 2, 1]],
+        [{"created_from": datetime.datetime(2025, 1, 2)}, [2, 3, 4]],
+        [{"created_to": datetime.datetime(2025, 1, 3)}, [1, 2]],
+        [{"completed_from": datetime.datetime(2025, 1, 1), "completed_to": datetime.datetime(2025, 2, 4)}, [2]],
+    ),
+)
+async def test_task_repo_find_page_filtered(test_uow, task_data, filters, expected_ids):
+    async with test_uow as uow:
+        for day in range(1, 5):
+            status = "completed" if day % 2 == 0 else "created"
+            completed_at = datetime.datetime(2025, 2, day) if status == "completed" else None
+            created_at = datetime.datetime(2025, 1, day)
+            await uow.task_repo.add_one(
+                {
+                    **task_data,
+                    "title": f"task{day}",
+                    "status": status,
+                    "created_at": created_at,
+                    "completed_at": completed_at,
+                }
+            )
+        await uow.commit()
+
+    async with test_uow as uow:
+        found_ids, cursor = [], None
+        while True:
+            tasks, cursor = await uow.task_repo.find_page(1, cursor, **filters)
+            found_ids.extend(task.id for task in tasks)
+            if cursor is None:
+                break
+
+        assert found_ids == expected_ids
+
+
+@pytest.mark.asyncio
+async def test_task_repo_find_page_wrong_order(test_uow):
+    async with test_uow as uow:
+        with pytest.raises(HTTPException) as exc_info:
+            await uow.task_repo.find_page(2, order_by="title")
+
+    assert exc_info.value.status_code == http_status.HTTP_400_BAD_REQUEST
+    assert exc_info.value.detail == "Wrong order"
+
+
+@pytest.mark.asyncio
+async def test_task_repo_stream_all(test_uow, task_data):
+    async with test_uow as uow:
+        for i in range(5):
+            await uow.task_repo.add_one({**task_data, "title": f"task{i}"})
+        await uow.commit()
+
+    async with test_uow as uow:
+        chunks = [[task.id for task in tasks] async for tasks in uow.task_repo.stream_all(2)]
+
+        assert chunks == [[1, 2], [3, 4], [5]]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cursor", ("wrong", "WyJvbmUiXQ==", "WzEsMl0="))
+async def test_task_repo_find_page_wrong_cursor(test_uow, cursor):
+    async with test_uow as uow:
+        with pytest.raises(HTTPException) as exc_info:
+            await uow.task_repo.find_page(2, cursor)
+
+    assert exc_info.value.status_code == http_status.HTTP_400_BAD_REQUEST
+    assert exc_info.value.detail == "Invalid cursor"
+
+
 @pytest.mark.asyncio
 async def test_task_repo_find_one(test_uow, task_data):
     async with test_uow as uow:
@@ -1,28 +1,111 @@
+from unittest.mock import MagicMock
+
 import pytest
 from fastapi import HTTPException, status
 
 from app.api.schemas.common import TaskWithUsers, UserWithTasks
-from app.api.schemas.task import TaskCreate, TaskFromDB
+from app.api.schemas.pagination import Page
+from app.api.schemas.task import TaskAssign, TaskCreate, TaskFromDB
+from app.api.schemas.user import UserPrincipal
+from app.api.schemas.websocket import EventFilter
+from app.repositories.base_repository import LoadStrategy
 
 
 @pytest.mark.asyncio
-async def test_task_service_get_tasks(task_from_db, mock_task_repo, task_service, mock_ws_manager, mock_uow):
-    mock_task_repo.find_all.return_value = [task_from_db]
+async def test_task_service_get_tasks(task_from_db, mock_task_repo, task_service, mock_task_event_repo, mock_uow):
+    mock_task_repo.find_page.return_value = ([task_from_db], "cursor")
 
-    tasks = await task_service.get_tasks()
+    page = await task_service.get_tasks(UserPrincipal(id=1, roles=["user", "admin"]), 10)
 
-    task = tasks[0]
+    task = page.items[0]
+    assert isinstance(page, Page)
+    assert page.next_cursor == "cursor"
     assert all(getattr(task, key) == val for key, val in task_from_db.model_dump().items())
     assert isinstance(task, TaskFromDB)
     assert not hasattr(task, "users")
-    mock_task_repo.find_all.assert_called_once()
-    mock_ws_manager.broadcast.assert_not_called()
+    mock_task_repo.find_page.assert_called_once_with(10, None, conditions=())
+    mock_task_event_repo.add_one.assert_not_called()
+    mock_uow.uow.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_task_service_get_tasks_for_user(mock_task_repo, task_service):
+    mock_task_repo.find_page.return_value = ([], None)
+
+    await task_service.get_tasks(UserPrincipal(id=2, roles=["user"]), 10, "cursor", status=["created"])
+
+    conditions = mock_task_repo.find_page.call_args.kwargs["conditions"]
+    compiled = conditions[0].compile(compile_kwargs={"literal_binds": True})
+    assert len(conditions) == 1
+    assert "users_tasks.user_id = 2" in str(compiled)
+    assert mock_task_repo.find_page.call_args.kwargs["status"] == ["created"]
+
+
+@pytest.mark.asyncio
+async def test_task_service_get_event_topics_for_admin(mock_task_repo, task_service):
+    event_filter = EventFilter(task_ids=[1], events=["task_updated"])
+
+    topics, scope = await task_service.get_event_topics(UserPrincipal(id=1, roles=["user", "admin"]), event_filter)
+
+    assert topics == {("task", 1), ("event", "task_updated")}
+    assert scope is None
+    mock_task_repo.find_ids.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "event_filter, expected",
+    (
+        [EventFilter(), set()],
+        [EventFilter(task_ids=[3]), {("task", 3)}],
+        [EventFilter(user_ids=[2], events=["task_updated"]), {("user", 2), ("event", "task_updated")}],
+        [EventFilter(events=["task_deleted"]), {("event", "task_deleted")}],
+    ),
+)
+async def test_task_service_get_event_topics_for_user(mock_task_repo, task_service, event_filter, expected):
+    mock_task_repo.find_ids.return_value = [3, 4]
+
+    topics, scope = await task_service.get_event_topics(UserPrincipal(id=2, roles=["user"]), event_filter)
+
+    assert topics == expected
+    assert scope == {("user", 2), ("task", 3), ("task", 4)}
+    conditions = mock_task_repo.find_ids.call_args.args[0]
+    assert "users_tasks.user_id = 2" in str(conditions[0].compile(compile_kwargs={"literal_binds": True}))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("event_filter", (EventFilter(task_ids=[3, 5]), EventFilter(user_ids=[1], events=["task_updated"])))
+async def test_task_service_get_event_topics_forbidden(mock_task_repo, task_service, event_filter):
+    mock_task_repo.find_ids.return_value = [3, 4]
+
+    with pytest.raises(HTTPException) as exc_info:
+        await task_service.get_event_topics(UserPrincipal(id=2, roles=["user"]), event_filter)
+
+    assert exc_info.value.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.asyncio
+async def test_task_service_export_tasks(task_from_db, mock_task_repo, task_service, mock_task_event_repo, mock_uow):
+    async def stream_all(chunk_size):
+        yield [task_from_db, task_from_db]
+        yield [task_from_db]
+
+    mock_task_repo.stream_all = MagicMock(side_effect=stream_all)
+
+    chunks = [chunk async for chunk in task_service.export_tasks(2)]
+
+    lines = "".join(chunks).splitlines()
+    assert len(chunks) == 2
+    assert len(lines) == 3
+    assert all(TaskFromDB.model_validate_json(line) == task_from_db for line in lines)
+    mock_task_repo.stream_all.assert_called_once_with(2)
+    mock_task_event_repo.add_one.assert_not_called()
     mock_uow.uow.commit.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_task_service_get_task(
-    task_data, task_with_users, mock_task_repo, task_service, mock_ws_manager, mock_uow
+    task_data, task_with_users, mock_task_repo, task_service, mock_task_event_repo, mock_uow
 ):
     mock_task_repo.find_one.return_value = task_with_users
 
@@ -30,14 +113,14 @@ async def test_task_service_get_task(
 
     assert all(getattr(task, key) == val for key, val in task_with_users.model_dump().items())
     assert isinstance(task, TaskWithUsers)
-    mock_task_repo.find_one.assert_called_once_with(**task_data)
-    mock_ws_manager.broadcast.assert_not_called()
+    mock_task_repo.find_one.assert_called_once_with(load=LoadStrategy.SELECTIN, **task_data)
+    mock_task_event_repo.add_one.assert_not_called()
     mock_uow.uow.commit.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_task_service_create_task(
-    task_data, task_from_db, mock_task_repo, task_service, mock_ws_manager, mock_uow
+    task_data, task_from_db, mock_task_repo, task_service, mock_task_event_repo, mock_outbox, mock_uow
 ):
     mock_task_repo.add_one.return_value = task_from_db
     task_in = TaskCreate(**task_data)
@@ -47,15 +130,36 @@ async def test_task_service_create_task(
     assert all(getattr(task, key) == val for key, val in task_from_db.model_dump().items())
     assert isinstance(task, TaskFromDB)
     mock_task_repo.add_one.assert_called_once_with(task_data)
-    mock_ws_manager.broadcast.assert_called_once()
+    mock_task_event_repo.add_one.assert_called_once()
+    mock_uow.uow.commit.assert_called_once()
+    mock_outbox.notify.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_task_service_create_tasks(
+    task_data, task_from_db, mock_task_repo, task_service, mock_task_event_repo, mock_uow
+):
+    mock_task_repo.add_many.return_value = [task_from_db, task_from_db]
+    tasks_in = [TaskCreate(**task_data), TaskCreate(**task_data)]
+
+    tasks = await task_service.create_tasks(tasks_in)
+
+    message = mock_task_event_repo.add_one.call_args.args[0]["payload"]
+    assert tasks == [task_from_db, task_from_db]
+    assert all(isinstance(task, TaskFromDB) for task in tasks)
+    assert message["event"] == "tasks_created"
+    assert len(message["tasks"]) == 2
+    mock_task_repo.add_many.assert_called_once_with([task_data, task_data])
+    mock_task_event_repo.add_one.assert_called_once()
     mock_uow.uow.commit.assert_called_once()
 
 
 @pytest.mark.asyncio
 async def test_task_service_delete_task(
-    task_data, task_from_db, mock_task_repo, task_service, mock_ws_manager, mock_uow
+    task_data, task_from_db, mock_task_repo, task_service, mock_task_event_repo, mock_uow
 ):
     mock_task_repo.remove_one.return_value = task_from_db
+    mock_task_repo.get_assignee_ids.return_value = [2, 3]
     task_id = task_from_db.id
 
     task = await task_service.delete_task(task_id)
@@ -63,15 +167,17 @@ async def test_task_service_delete_task(
     assert all(getattr(task, key) == val for key, val in task_from_db.model_dump().items())
     assert isinstance(task, TaskFromDB)
     mock_task_repo.remove_one.assert_called_once_with(task_id)
-    mock_ws_manager.broadcast.assert_called_once()
+    mock_task_repo.get_assignee_ids.assert_called_once_with(task_id)
+    assert mock_task_event_repo.add_one.call_args.args[0]["payload"]["user_ids"] == [2, 3]
     mock_uow.uow.commit.assert_called_once()
 
 
 @pytest.mark.asyncio
 async def test_task_service_update_task(
-    task_data, task_from_db, mock_task_repo, task_service, mock_ws_manager, mock_uow
+    task_data, task_from_db, mock_task_repo, task_service, mock_task_event_repo, mock_uow
 ):
     mock_task_repo.update_one.return_value = task_from_db
+    mock_task_repo.get_assignee_ids.return_value = [2]
     task_in = TaskCreate(**task_data)
     task_id = task_from_db.id
 
@@ -80,12 +186,13 @@ async def test_task_service_update_task(
     assert all(getattr(task, key) == val for key, val in task_from_db.model_dump().items())
     assert isinstance(task, TaskFromDB)
     mock_task_repo.update_one.assert_called_once_with(task_id, task_data)
-    mock_ws_manager.broadcast.assert_called_once()
+    mock_task_repo.get_assignee_ids.assert_called_once_with(task_id)
+    assert mock_task_event_repo.add_one.call_args.args[0]["payload"]["user_ids"] == [2]
     mock_uow.uow.commit.assert_called_once()
 
 
 async def test_task_service_assign_task(
-    task_with_users, user_with_tasks, mock_task_repo, mock_user_repo, task_service, mock_ws_manager, mock_uow
+    task_with_users, user_with_tasks, mock_task_repo, mock_user_repo, task_service, mock_task_event_repo, mock_uow
 ):
     mock_task_repo.find_one.return_value = task_with_users
     mock_user_repo.find_one.return_value = user_with_tasks
@@ -99,14 +206,14 @@ async def test_task_service_assign_task(
     assert isinstance(task, TaskWithUsers)
     assert all(getattr(user, key) == val for key, val in user_with_tasks.model_dump().items())
     assert isinstance(user, UserWithTasks)
-    mock_task_repo.find_one.assert_called_once_with(id=task_id)
-    mock_user_repo.find_one.assert_called_once_with(id=user_id)
-    mock_ws_manager.broadcast.assert_called_once()
+    mock_task_repo.find_one.assert_called_once_with(load=LoadStrategy.SELECTIN, id=task_id)
+    mock_user_repo.find_one.assert_called_once_with(load=LoadStrategy.NONE, id=user_id)
+    mock_task_event_repo.add_one.assert_called_once()
     mock_uow.uow.commit.assert_called_once()
 
 
 async def test_task_service_already_assigned(
-    task_with_users, user_with_tasks, mock_task_repo, mock_user_repo, task_service, mock_ws_manager, mock_uow
+    task_with_users, user_with_tasks, mock_task_repo, mock_user_repo, task_service, mock_task_event_repo, mock_uow
 ):
     task_with_users.users.append(user_with_tasks)
     mock_task_repo.find_one.return_value = task_with_users
@@ -119,14 +226,14 @@ async def test_task_service_already_assigned(
 
     assert exc_info.value.status_code == status.HTTP_409_CONFLICT
     assert exc_info.value.detail == "User is already assigned"
-    mock_task_repo.find_one.assert_called_once_with(id=task_id)
-    mock_user_repo.find_one.assert_called_once_with(id=user_id)
-    mock_ws_manager.broadcast.assert_not_called()
+    mock_task_repo.find_one.assert_called_once_with(load=LoadStrategy.SELECTIN, id=task_id)
+    mock_user_repo.find_one.assert_called_once_with(load=LoadStrategy.NONE, id=user_id)
+    mock_task_event_repo.add_one.assert_not_called()
     mock_uow.uow.commit.assert_not_called()
 
 
 async def test_task_service_unassign_task(
-    task_with_users, user_with_tasks, mock_task_repo, mock_user_repo, task_service, mock_ws_manager, mock_uow
+    task_with_users, user_with_tasks, mock_task_repo, mock_user_repo, task_service, mock_task_event_repo, mock_uow
 ):
     task_with_users.users.append(user_with_tasks)
     mock_task_repo.find_one.return_value = task_with_users
@@ -138,14 +245,14 @@ async def test_task_service_unassign_task(
 
     assert all(getattr(task, key) == val for key, val in task_with_users.model_dump().items())
     assert isinstance(task, TaskWithUsers)
-    mock_task_repo.find_one.assert_called_once_with(id=task_id)
-    mock_user_repo.find_one.assert_called_once_with(id=user_id)
-    mock_ws_manager.broadcast.assert_called_once()
+    mock_task_repo.find_one.assert_called_once_with(load=LoadStrategy.SELECTIN, id=task_id)
+    mock_user_repo.find_one.assert_called_once_with(load=LoadStrategy.NONE, id=user_id)
+    mock_task_event_repo.add_one.assert_called_once()
     mock_uow.uow.commit.assert_called_once()
 
 
 async def test_task_service_already_not_assigned(
-    task_with_users, user_with_tasks, mock_task_repo, mock_user_repo, task_service, mock_ws_manager, mock_uow
+    task_with_users, user_with_tasks, mock_task_repo, mock_user_repo, task_service, mock_task_event_repo, mock_uow
 ):
     mock_task_repo.find_one.return_value = task_with_users
     mock_user_repo.find_one.return_value = user_with_tasks
@@ -157,7 +264,42 @@ async def test_task_service_already_not_assigned(
 
     assert exc_info.value.status_code == status.HTTP_409_CONFLICT
     assert exc_info.value.detail == "User is not assigned"
-    mock_task_repo.find_one.assert_called_once_with(id=task_id)
-    mock_user_repo.find_one.assert_called_once_with(id=user_id)
-    mock_ws_manager.broadcast.assert_not_called()
+    mock_task_repo.find_one.assert_called_once_with(load=LoadStrategy.SELECTIN, id=task_id)
+    mock_user_repo.find_one.assert_called_once_with(load=LoadStrategy.NONE, id=user_id)
+    mock_task_event_repo.add_one.assert_not_called()
     mock_uow.uow.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "method, repo_method, event",
+    (
+        ["assign_tasks", "add_assignments", "tasks_assigned"],
+        ["unassign_tasks", "remove_assignments", "tasks_unassigned"],
+    ),
+)
+async def test_task_service_bulk_assign(
+    mock_task_repo, task_service, mock_task_event_repo, mock_uow, method, repo_method, event
+):
+    getattr(mock_task_repo, repo_method).return_value = [(1, 1)]
+    assignments = [TaskAssign(task_id=1, user_id=1), TaskAssign(task_id=2, user_id=1), TaskAssign(task_id=1, user_id=1)]
+
+    result = await getattr(task_service, method)(assignments)
+
+    assert result.applied == [TaskAssign(task_id=1, user_id=1)]
+    assert result.skipped == [TaskAssign(task_id=2, user_id=1)]
+    getattr(mock_task_repo, repo_method).assert_called_once_with([(1, 1), (2, 1)])
+    message = {"event": event, "assignments": [{"task_id": 1, "user_id": 1}]}
+    mock_task_event_repo.add_one.assert_called_once_with({"event": event, "payload": message})
+    mock_uow.uow.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_task_service_bulk_assign_nothing_applied(mock_task_repo, task_service, mock_task_event_repo, mock_uow):
+    mock_task_repo.add_assignments.return_value = []
+
+    result = await task_service.assign_tasks([TaskAssign(task_id=1, user_id=1)])
+
+    assert result.applied == []
+    assert result.skipped == [TaskAssign(task_id=1, user_id=1)]
+    mock_task_event_repo.add_one.assert_not_called()
@@ -2,22 +2,25 @@ import pytest
 from fastapi import status
 from fastapi.exceptions import ResponseValidationError
 
-from app.api.schemas.user import UserAuth, UserCreate
+from app.api.schemas.user import TokenRefresh, UserAuth, UserCreate
+from app.core.config import settings
+from app.utils.rate_limit import get_login_admission
 
 
 @pytest.mark.asyncio
 async def test_get_users(async_mock_client, user_from_db, mock_user_service):
-    mock_user_service.get_users.return_value = [user_from_db]
+    mock_user_service.get_users.return_value = {"items": [user_from_db], "next_cursor": None}
 
-    response = await async_mock_client.get("/users/")
+    response = await async_mock_client.get("/users/", params={"cursor": "cursor"})
 
     response_data = response.json()
-    user = response_data[0]
+    user = response_data["items"][0]
     assert response.status_code == status.HTTP_200_OK
-    assert isinstance(response_data, list)
+    assert isinstance(response_data["items"], list)
+    assert response_data["next_cursor"] is None
     assert user == user_from_db.model_dump()
     assert not hasattr(user, "password")
-    mock_user_service.get_users.assert_called_once()
+    mock_user_service.get_users.assert_called_once_with(limit=settings.PAGE_DEFAULT_LIMIT, cursor="cursor")
 
 
 @pytest.mark.asyncio
@@ -142,7 +145,7 @@ async def test_delete_user(async_mock_client, user_from_db, mock_user_service):
 
 @pytest.mark.asyncio
 async def test_login_user(async_mock_client, user_data, mock_user_service):
-    token_data = {"access_token": "1111", "token_type": "Bearer"}
+    token_data = {"access_token": "1111", "token_type": "Bearer", "refresh_token": "2222"}
     user_to_auth = UserAuth(**user_data)
     mock_user_service.login_user.return_value = token_data
 
@@ -152,3 +155,39 @@ async def test_login_user(async_mock_client, user_data, mock_user_service):
     assert response.status_code == status.HTTP_200_OK
     assert response_data == token_data
     mock_user_service.login_user.assert_called_once_with(user_to_auth)
+
+
+@pytest.mark.asyncio
+async def test_login_user_rate_limited(async_mock_client, user_data, mock_user_service, monkeypatch):
+    admission = get_login_admission()
+    monkeypatch.setattr(admission.username_limiter, "burst_offset", admission.username_limiter.emission_interval)
+    mock_user_service.login_user.return_value = {"access_token": "1111", "token_type": "Bearer"}
+
+    first = await async_mock_client.post("/users/login/", json=user_data)
+    second = await async_mock_client.post("/users/login/", json=user_data)
+
+    assert first.status_code == status.HTTP_200_OK
+    assert second.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert second.json()["detail"] == "Too many login attempts"
+    assert int(second.headers["Retry-After"]) > 0
+    mock_user_service.login_user.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_refresh_token(async_mock_client, mock_user_service):
+    token_data = {"access_token": "1111", "token_type": "Bearer", "refresh_token": "3333"}
+    mock_user_service.refresh_token.return_value = token_data
+
+    response = await async_mock_client.post("/users/token/refresh/", json={"refresh_token": "2222"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == token_data
+    mock_user_service.refresh_token.assert_called_once_with(TokenRefresh(refresh_token="2222"))
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_wrong_input(async_mock_client, mock_user_service):
+    response = await async_mock_client.post("/users/token/refresh/", json={})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    mock_user_service.refresh_token.assert_not_called()
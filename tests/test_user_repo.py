@@ -75,6 +75,41 @@ async def test_user_repo_already_exists(test_uow, user_data):
     assert exc_info.value.detail == "Already exists"
 
 
+@pytest.mark.asyncio
+async def test_user_repo_username_already_exists(test_uow, user_data):
+    async with test_uow as uow:
+        await uow.user_repo.add_one(user_data)
+        await uow.commit()
+
+    async with test_uow as uow:
+        with pytest.raises(HTTPException) as exc_info:
+            await uow.user_repo.add_one({**user_data, "password": "other", "roles": ["admin"]})
+
+        users = await uow.user_repo.find_all()
+
+    assert exc_info.value.status_code == status.HTTP_409_CONFLICT
+    assert len(users) == 1
+
+
+@pytest.mark.asyncio
+async def test_user_repo_update_username_already_exists(test_uow, user_data):
+    async with test_uow as uow:
+        await uow.user_repo.add_one(user_data)
+        await uow.user_repo.add_one({**user_data, "username": "user2"})
+        await uow.commit()
+
+    async with test_uow as uow:
+        with pytest.raises(HTTPException) as exc_info:
+            await uow.user_repo.update_one(2, {"username": user_data["username"]})
+
+    async with test_uow as uow:
+        user = await uow.user_repo.find_one(id=2)
+
+    assert exc_info.value.status_code == status.HTTP_409_CONFLICT
+    assert exc_info.value.detail == "Already exists"
+    assert user.username == "user2"
+
+
 @pytest.mark.asyncio
 async def test_user_repo_find_all(test_uow, user_data):
     async with test_uow as uow:
@@ -308,3 +343,26 @@ async def test_user_repo_remove(test_uow, user_data):
             await uow.user_repo.remove_one(1)
 
         assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "roles, token_version",
+    (
+        [["user"], 0],
+        [["user", "admin"], 1],
+    ),
+)
+async def test_user_repo_update_token_version(test_uow, user_data, roles, token_version):
+    async with test_uow as uow:
+        await uow.user_repo.add_one(user_data)
+        await uow.commit()
+        assert await uow.user_repo.get_token_version(1) == 0
+
+    async with test_uow as uow:
+        updated_user = await uow.user_repo.update_one(1, {"roles": roles})
+        await uow.commit()
+
+        assert updated_user.token_version == token_version
+        assert await uow.user_repo.get_token_version(1) == token_version
+        assert await uow.user_repo.get_token_version(2) is None
@@ -1,23 +1,29 @@
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pytest
 from fastapi import HTTPException, status
 
 from app.api.schemas.common import UserWithTasks
-from app.api.schemas.user import UserAuth, UserCreate, UserFromDB
+from app.api.schemas.pagination import Page
+from app.api.schemas.user import TokenRefresh, UserAuth, UserCreate, UserFromDB, UserPrincipal
+from app.core.security import create_access_token, create_refresh_token, decode_refresh_token, decode_token
+from app.repositories.base_repository import LoadStrategy
+from app.utils.cache import RevocationStore, TTLCache
 
 
 @pytest.mark.asyncio
 async def test_user_service_get_users(user_from_db, mock_user_repo, user_service, mock_uow):
-    mock_user_repo.find_all.return_value = [user_from_db]
+    mock_user_repo.find_page.return_value = ([user_from_db], None)
 
-    users = await user_service.get_users()
+    page = await user_service.get_users(10, "cursor")
 
-    user = users[0]
+    user = page.items[0]
+    assert isinstance(page, Page)
+    assert page.next_cursor is None
     assert all(getattr(user, key) == val for key, val in user_from_db.model_dump().items())
     assert isinstance(user, UserFromDB)
     assert hasattr(user, "tasks") is False
-    mock_user_repo.find_all.assert_called_once()
+    mock_user_repo.find_page.assert_called_once_with(10, "cursor")
     mock_uow.uow.commit.assert_not_called()
 
 
@@ -30,16 +36,61 @@ async def test_user_service_get_user(user_data, user_with_tasks, mock_user_repo,
     assert all(getattr(user, key) == val for key, val in user_with_tasks.model_dump().items())
     assert isinstance(user, UserWithTasks)
     assert hasattr(user, "password") is False
-    mock_user_repo.find_one.assert_called_once_with(**user_data)
+    mock_user_repo.find_one.assert_called_once_with(load=LoadStrategy.SELECTIN, **user_data)
     mock_uow.uow.commit.assert_not_called()
 
 
+@pytest.mark.asyncio
+async def test_user_service_get_principal(user_from_db, mock_user_repo, user_service, mock_uow):
+    mock_user_repo.find_one.return_value = user_from_db
+
+    user = await user_service.get_principal(user_from_db.id)
+
+    assert user.id == user_from_db.id
+    assert user.roles == user_from_db.roles
+    assert isinstance(user, UserPrincipal)
+    mock_user_repo.find_one.assert_called_once_with(load=LoadStrategy.NONE, id=user_from_db.id)
+    mock_uow.uow.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_user_service_get_principal_cached(user_from_db, mock_user_repo, user_service):
+    mock_user_repo.find_one.return_value = user_from_db
+
+    first = await user_service.get_principal(user_from_db.id)
+    second = await user_service.get_principal(user_from_db.id)
+
+    assert first is second
+    mock_user_repo.find_one.assert_called_once()
+    assert user_service.principal_cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("method", ["update_user", "delete_user"])
+async def test_user_service_principal_invalidated(
+    user_data, user_from_db, user_with_password, mock_user_repo, user_service, method
+):
+    mock_user_repo.find_one.return_value = user_from_db
+    mock_user_repo.update_one.return_value = user_with_password
+    mock_user_repo.remove_one.return_value = user_from_db
+    await user_service.get_principal(user_from_db.id)
+
+    with patch("app.services.user_service.hash_password", return_value="password"):
+        if method == "update_user":
+            await user_service.update_user(user_from_db.id, UserCreate(**user_data))
+        else:
+            await user_service.delete_user(user_from_db.id)
+    await user_service.get_principal(user_from_db.id)
+
+    assert mock_user_repo.find_one.call_count == 2
+
+
 @pytest.mark.asyncio
 async def test_user_service_create_user(user_data, user_from_db, mock_user_repo, user_service, mock_uow):
     mock_user_repo.add_one.return_value = user_from_db
     user_in = UserCreate(**user_data)
 
-    with patch("app.services.user_service.get_password_hash", return_value="password"):
+    with patch("app.services.user_service.hash_password", return_value="password"):
         user = await user_service.create_user(user_in)
 
     assert all(getattr(user, key) == val for key, val in user_from_db.model_dump().items())
@@ -63,32 +114,127 @@ async def test_user_service_delete_user(user_data, user_from_db, mock_user_repo,
 
 
 @pytest.mark.asyncio
-async def test_user_service_update_user(user_data, user_from_db, mock_user_repo, user_service, mock_uow):
-    mock_user_repo.update_one.return_value = user_from_db
+async def test_user_service_update_user(
+    user_data, user_from_db, user_with_password, mock_user_repo, user_service, mock_uow
+):
+    user_with_password.token_version = 3
+    mock_user_repo.update_one.return_value = user_with_password
     user_in = UserCreate(**user_data)
     user_id = user_from_db.id
 
-    with patch("app.services.user_service.get_password_hash", return_value="password"):
+    with patch("app.services.user_service.hash_password", return_value="password"):
         user = await user_service.update_user(user_id, user_in)
 
     assert all(getattr(user, key) == val for key, val in user_from_db.model_dump().items())
     assert isinstance(user, UserFromDB)
+    assert await user_service.get_token_version(user_id) == 3
     mock_user_repo.update_one.assert_called_once_with(user_id, user_data)
+    mock_user_repo.get_token_version.assert_not_called()
     mock_uow.uow.commit.assert_called_once()
 
 
 @pytest.mark.asyncio
-async def test_user_service_login_user(user_data, user_with_password, mock_user_repo, user_service, mock_uow):
+async def test_user_service_login_user(
+    user_data, user_with_password, mock_user_repo, mock_refresh_token_repo, user_service, mock_uow
+):
     mock_user_repo.find_one.return_value = user_with_password
     user_auth = UserAuth(**user_data)
 
-    with patch("app.services.user_service.verify_password", return_value=True):
+    with patch("app.services.user_service.check_password", return_value=True):
         token_data = await user_service.login_user(user_auth)
 
-    assert hasattr(token_data, "access_token")
+    payload = await decode_token(token_data.access_token, TTLCache(max_size=10, ttl=60), RevocationStore())
+    refresh_payload = decode_refresh_token(token_data.refresh_token, RevocationStore())
+    stored_token = mock_refresh_token_repo.add_one.call_args.args[0]
     assert getattr(token_data, "token_type") == "Bearer"
-    mock_user_repo.find_one.assert_called_once_with(**user_auth.model_dump())
-    mock_uow.uow.commit.assert_not_called()
+    assert payload["sub"] == str(user_with_password.id)
+    assert payload["roles"] == user_with_password.roles
+    assert payload["ver"] == user_with_password.token_version
+    assert payload["type"] == "access"
+    assert payload["sid"] == refresh_payload["sid"] == stored_token["session_id"]
+    assert refresh_payload["jti"] == stored_token["id"]
+    assert stored_token["user_id"] == user_with_password.id
+    mock_user_repo.find_one.assert_called_once_with(load=LoadStrategy.NONE, **user_auth.model_dump())
+    mock_uow.uow.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_user_service_refresh_token(
+    user_with_password, mock_user_repo, mock_refresh_token_repo, user_service, mock_uow
+):
+    refresh_token = create_refresh_token({"sub": "1", "sid": "session", "jti": "token"})
+    mock_refresh_token_repo.rotate.return_value = MagicMock(user_id=user_with_password.id)
+    mock_user_repo.find_one.return_value = user_with_password
+
+    token_data = await user_service.refresh_token(TokenRefresh(refresh_token=refresh_token))
+
+    refresh_payload = decode_refresh_token(token_data.refresh_token, RevocationStore())
+    assert refresh_payload["sid"] == "session"
+    assert refresh_payload["jti"] != "token"
+    assert token_data.refresh_token != refresh_token
+    mock_refresh_token_repo.rotate.assert_called_once_with("token")
+    mock_refresh_token_repo.add_one.assert_called_once()
+    mock_refresh_token_repo.revoke_session.assert_not_called()
+    mock_user_repo.find_one.assert_called_once_with(load=LoadStrategy.NONE, id=user_with_password.id)
+    mock_uow.uow.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_user_service_refresh_token_reuse(mock_refresh_token_repo, user_service, mock_uow):
+    refresh_token = create_refresh_token({"sub": "1", "sid": "session", "jti": "token"})
+    access_token = create_access_token({"sub": "1", "sid": "session"})
+    mock_refresh_token_repo.rotate.return_value = None
+
+    with pytest.raises(HTTPException) as exc_info:
+        await user_service.refresh_token(TokenRefresh(refresh_token=refresh_token))
+
+    assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+    assert exc_info.value.detail == "Token revoked"
+    assert user_service.revoked_sessions.is_revoked("session")
+    mock_refresh_token_repo.revoke_session.assert_called_once_with("session")
+    mock_refresh_token_repo.add_one.assert_not_called()
+    mock_uow.uow.commit.assert_called_once()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await decode_token(access_token, TTLCache(max_size=10, ttl=60), user_service.revoked_sessions)
+    assert exc_info.value.detail == "Token revoked"
+
+    with pytest.raises(HTTPException) as exc_info:
+        await user_service.refresh_token(TokenRefresh(refresh_token=refresh_token))
+    assert exc_info.value.detail == "Token revoked"
+    mock_refresh_token_repo.rotate.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_user_service_refresh_token_with_access_token(mock_refresh_token_repo, user_service):
+    access_token = create_access_token({"sub": "1", "sid": "session"})
+
+    with pytest.raises(HTTPException) as exc_info:
+        await user_service.refresh_token(TokenRefresh(refresh_token=access_token))
+
+    assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+    assert exc_info.value.detail == "Invalid token"
+    mock_refresh_token_repo.rotate.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_user_service_get_token_version(mock_user_repo, user_service):
+    mock_user_repo.get_token_version.return_value = 2
+
+    first = await user_service.get_token_version(1)
+    second = await user_service.get_token_version(1)
+
+    assert first == second == 2
+    mock_user_repo.get_token_version.assert_called_once_with(1)
+
+
+@pytest.mark.asyncio
+async def test_user_service_get_token_version_not_found(mock_user_repo, user_service):
+    mock_user_repo.get_token_version.return_value = None
+
+    assert await user_service.get_token_version(1) is None
+    assert await user_service.get_token_version(1) is None
+    assert mock_user_repo.get_token_version.call_count == 2
 
 
 @pytest.mark.asyncio
@@ -96,11 +242,11 @@ async def test_user_service_login_user_incorrect(user_data, user_with_password,
     mock_user_repo.find_one.return_value = user_with_password
     user_auth = UserAuth(**user_data)
 
-    with patch("app.services.user_service.verify_password", return_value=False):
+    with patch("app.services.user_service.check_password", return_value=False):
         with pytest.raises(HTTPException) as exc_info:
             await user_service.login_user(user_auth)
 
     assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
     assert exc_info.value.detail == "Incorrect password"
-    mock_user_repo.find_one.assert_called_once_with(**user_auth.model_dump())
+    mock_user_repo.find_one.assert_called_once_with(load=LoadStrategy.NONE, **user_auth.model_dump())
     mock_uow.uow.commit.assert_not_called()
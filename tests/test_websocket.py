@@ -3,6 +3,7 @@ import json
 import threading
 import time
 
+import msgpack
 import pytest
 import uvicorn
 import websockets
@@ -99,3 +100,56 @@ async def test_websocket_broadcast_multiple_messages():
             cur_raw = await ws_client.recv()
             cur_msg = json.loads(cur_raw)
             assert cur_msg == message
+
+
+@pytest.mark.asyncio
+async def test_websocket_subscription():
+    messages = [{"event": "task_updated", "task": {"id": 2}}, {"event": "task_updated", "task": {"id": 1}}]
+    ws_manager = get_ws_manager()
+
+    async with websockets.connect(ws_url) as ws_client:
+        await ws_client.send(json.dumps({"action": "subscribe", "task_ids": [1]}))
+        ack = json.loads(await ws_client.recv())
+
+        for message in messages:
+            await ws_manager.broadcast(message)
+        received_msg = json.loads(await ws_client.recv())
+
+    assert ack == {"event": "subscribed", "task_ids": [1], "user_ids": [], "events": []}
+    assert received_msg == messages[1]
+
+
+@pytest.mark.asyncio
+async def test_websocket_msgpack_encoding():
+    message = {"event": "task_updated", "task": {"id": 1}}
+    ws_manager = get_ws_manager()
+
+    async with websockets.connect(ws_url, subprotocols=["msgpack"]) as msgpack_ws:
+        async with websockets.connect(f"{ws_url}?encoding=msgpack") as query_ws:
+            await asyncio.sleep(0.1)
+            await ws_manager.broadcast(message)
+            subprotocol_raw = await msgpack_ws.recv()
+            query_raw = await query_ws.recv()
+
+        assert msgpack_ws.subprotocol == "msgpack"
+
+    assert msgpack.unpackb(subprotocol_raw) == message
+    assert msgpack.unpackb(query_raw) == message
+
+
+@pytest.mark.asyncio
+async def test_websocket_binary_messages():
+    ws_manager = get_ws_manager()
+
+    async with websockets.connect(ws_url, subprotocols=["msgpack"]) as ws_client:
+        await ws_client.send(msgpack.packb({"action": "subscribe", "task_ids": [1]}))
+        ack = msgpack.unpackb(await ws_client.recv())
+        await ws_client.send(b"\xc1")
+        error = msgpack.unpackb(await ws_client.recv())
+
+        assert len(ws_manager.active_connections) == 1
+
+    await asyncio.sleep(0.1)
+    assert ack == {"event": "subscribed", "task_ids": [1], "user_ids": [], "events": []}
+    assert error == {"event": "error", "detail": "Wrong message"}
+    assert ws_manager.active_connections == {}